@@ -0,0 +1,110 @@
+"""
+Backend configuration, read once per process from the environment (and a
+.env file, if present) into a Settings object.
+
+Every field is set by the environment variable of the same name in upper
+case, e.g. GAME_CHAT_SECONDS=120 sets game_chat_seconds. env_template.sh
+lists them with their meaning.
+"""
+import os
+from functools import lru_cache
+from typing import List, Mapping, Optional
+
+from pydantic import BaseModel
+
+DEFAULT_HOSTED_MODEL = "ft:gpt-4o-mini-2024-07-18:personal:ai-impostor-coba:Ar2Wjr63"
+
+
+class Settings(BaseModel):
+    # Game rules and phase lengths (s)
+    game_chat_seconds: float = 300
+    game_voting_seconds: float = 15
+    game_results_seconds: float = 5
+    game_max_players: int = 5
+    game_max_rounds: int = 5
+
+    # WebSocket liveness, resume and flood guards
+    ws_heartbeat_interval: float = 15
+    ws_heartbeat_timeout: float = 45
+    ws_reconnect_grace: float = 30
+    ws_resume_buffer: int = 200
+    ws_frame_rate: float = 10
+    ws_frame_burst: float = 20
+    ws_max_frame_bytes: int = 4096
+    chat_rate: float = 1
+    chat_burst: float = 5
+    session_chat_rate: float = 4
+    session_chat_burst: float = 15
+    chat_max_chars: int = 500
+    cors_origins: str = "http://localhost:3000"  # Comma-separated
+
+    # AI player
+    ai_backend: str = "hosted"
+    ai_model: str = DEFAULT_HOSTED_MODEL
+    ai_stream_mode: str = "paced"
+    ai_typing_cps: float = 8
+    ai_debounce: float = 1.0
+    ai_max_wait: float = 8
+    prompt_token_budget: int = 1500
+    local_model_workers: int = 2
+    local_model_corpus: str = ""  # Comma-separated
+    local_model_context: int = 4
+
+    # Completions API
+    openai_api_key: Optional[str] = None
+    openai_base_url: Optional[str] = None
+    llm_timeout: float = 20
+    llm_max_connections: int = 32
+    llm_max_retries: int = 1
+    llm_max_concurrency: int = 16
+    llm_batch_window: float = 0.05
+    llm_queue_max_wait: float = 5
+    llm_rate_limit_backoff: float = 2
+
+    # Reply cache for short messages
+    response_cache_size: int = 1000
+    response_cache_ttl: float = 3600
+    response_cache_variants: int = 3
+    response_cache_max_chars: int = 40
+
+    # Outbound WebSocket queues
+    broadcast_slow_policy: str = "drop"
+    broadcast_compact_keep: int = 16
+    broadcast_send_timeout: float = 5
+    broadcast_queue_size: int = 64
+
+    # Session storage and reaping (TTLs in seconds of inactivity, by phase)
+    session_store: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    session_reap_interval: float = 60
+    max_sessions: int = 10000
+    session_ttl_empty: float = 120
+    session_ttl_lobby: float = 1800
+    session_ttl_chat: float = 900
+    session_ttl_voting: float = 300
+    session_ttl_results: float = 120
+
+    # Matchmaking, game log, event loop monitoring and logging
+    match_reservation_ttl: float = 30
+    game_log_dir: str = ""
+    game_log_flush_interval: float = 0.5
+    game_log_batch: int = 256
+    loop_monitor_interval: float = 0.5
+    loop_block_threshold: float = 0.1
+    log_level: str = "INFO"
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "Settings":
+        return cls(**{name: environ[name.upper()] for name in cls.model_fields if name.upper() in environ})
+
+    @staticmethod
+    def split(value: str) -> List[str]:
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """The process-wide settings, loaded on first use."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return Settings.from_env()
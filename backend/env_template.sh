@@ -1 +1,105 @@
-OPENAI_API_KEY=
\ No newline at end of file
+OPENAI_API_KEY=
+# Optional: point at a local stub (uvicorn tools.llm_stub:app --port 8001)
+OPENAI_BASE_URL=
+LLM_TIMEOUT=20
+LLM_MAX_CONCURRENCY=16
+LLM_MAX_CONNECTIONS=32
+
+# Outbound fan-out: per-connection queue size and slow consumer policy (drop|compact)
+BROADCAST_QUEUE_SIZE=64
+BROADCAST_SLOW_POLICY=drop
+BROADCAST_COMPACT_KEEP=16
+BROADCAST_SEND_TIMEOUT=5
+
+# Approximate token budget for the chat history sent to the model
+PROMPT_TOKEN_BUDGET=1500
+
+# AI scheduler: quiet window before a turn, and the longest a turn can be pushed back
+AI_DEBOUNCE=1.0
+AI_MAX_WAIT=8
+
+# Session storage: "memory" (single worker) or "redis" (shared across workers, needs the redis package)
+SESSION_STORE=memory
+REDIS_URL=redis://localhost:6379/0
+
+# Game phase lengths in seconds
+GAME_CHAT_SECONDS=300
+GAME_VOTING_SECONDS=15
+
+# AI reply cache: entries, lifetime (s), variants kept per key, longest message that is cached
+RESPONSE_CACHE_SIZE=1000
+RESPONSE_CACHE_TTL=3600
+RESPONSE_CACHE_VARIANTS=3
+RESPONSE_CACHE_MAX_CHARS=40
+
+# AI reply delivery: off | paced | incremental, and typing speed (characters per second) for paced mode
+AI_STREAM_MODE=paced
+AI_TYPING_CPS=8
+
+# Session cleanup: sweep interval (s), cap on live sessions, idle TTLs (s) per phase and once no humans are left
+SESSION_REAP_INTERVAL=60
+MAX_SESSIONS=10000
+SESSION_TTL_LOBBY=1800
+SESSION_TTL_CHAT=900
+SESSION_TTL_VOTING=300
+SESSION_TTL_RESULTS=120
+SESSION_TTL_EMPTY=120
+
+# Event loop blocking detection: probe interval and the lag (s) counted as blocked
+LOOP_MONITOR_INTERVAL=0.5
+LOOP_BLOCK_THRESHOLD=0.1
+
+# Level for the backend's own log messages (DEBUG, INFO, WARNING or ERROR)
+LOG_LEVEL=INFO
+
+# Game event log: directory for session-<id>.jsonl files (empty disables it; ended games move to finished/),
+# flush interval (s) and batch size
+GAME_LOG_DIR=game_logs
+GAME_LOG_FLUSH_INTERVAL=0.5
+GAME_LOG_BATCH=256
+
+# Rounds: pause (s) between a round's result and the next round, and rounds the AI must survive to win
+GAME_RESULTS_SECONDS=5
+GAME_MAX_ROUNDS=5
+
+# LLM dispatch: window (s) for collecting a burst before serving it by priority, longest a reply may wait for a slot (s),
+# and pause (s) after a 429 when the provider sends no Retry-After
+LLM_BATCH_WINDOW=0.05
+LLM_QUEUE_MAX_WAIT=5
+LLM_RATE_LIMIT_BACKOFF=2
+
+# Matchmaking: room size (counting the AI) and how long (s) a matched player's slot is held before they connect
+GAME_MAX_PLAYERS=5
+MATCH_RESERVATION_TTL=30
+
+# WebSocket liveness and resume: ping interval (s), silence (s) before a connection is closed,
+# how long (s) a dropped player keeps their seat, and broadcasts kept per session for replay
+WS_HEARTBEAT_INTERVAL=15
+WS_HEARTBEAT_TIMEOUT=45
+WS_RECONNECT_GRACE=30
+WS_RESUME_BUFFER=200
+
+# AI backend: "hosted" (the fine-tuned chat completions model named by AI_MODEL) or "local"
+# (offline n-gram chat model in LOCAL_MODEL_WORKERS processes, trained on the built-in corpus
+# plus the comma-separated text files / game log directories in LOCAL_MODEL_CORPUS)
+AI_BACKEND=hosted
+AI_MODEL=ft:gpt-4o-mini-2024-07-18:personal:ai-impostor-coba:Ar2Wjr63
+LOCAL_MODEL_WORKERS=2
+LOCAL_MODEL_CORPUS=
+LOCAL_MODEL_CONTEXT=4
+
+# Flood guards: chat messages per second and burst per player and per session, longest chat message (chars),
+# frames per second and burst per connection (excess is dropped), and largest frame (bytes) before the connection is closed.
+# Run uvicorn with --ws-max-size a little above WS_MAX_FRAME_BYTES so larger messages are refused while being read.
+CHAT_RATE=1
+CHAT_BURST=5
+SESSION_CHAT_RATE=4
+SESSION_CHAT_BURST=15
+CHAT_MAX_CHARS=500
+WS_FRAME_RATE=10
+WS_FRAME_BURST=20
+WS_MAX_FRAME_BYTES=4096
+
+# Frontend origins allowed by CORS (comma-separated).
+# Every variable in this file is read once at start-up into config.Settings.
+CORS_ORIGINS=http://localhost:3000
@@ -1,18 +1,54 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from config import Settings, get_settings
 from router.chat_router import router as chat_router
+from service.session_service import SessionService
 
-# Initialize the FastAPI app
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the store, timers and caches from this app's settings, then subscribe to session broadcasts (shared across workers with SESSION_STORE=redis)
+    # and start the AI backend, which loads its client or model in the background
+    SessionService.configure(app.state.settings)
+    await SessionService.start()
+    yield
+    # Also releases the AI backend (pooled connections or local model workers)
+    await SessionService.stop()
 
-# Enable CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Build the application from `settings` (default: the environment). Run it
+    with `uvicorn main:create_app --factory`. Nothing is built at import time:
+    the session store, timers and AI clients are created at start-up, in the
+    lifespan, and heavy SDKs are imported off the event loop.
 
-# Include the chat router
-app.include_router(chat_router)
+    Also pass `--ws-max-size` a little above WS_MAX_FRAME_BYTES (e.g. 8192):
+    uvicorn otherwise buffers WebSocket messages of up to 16 MiB before the
+    chat router gets to reject them.
+    """
+    settings = settings or get_settings()
+    # The service modules log through logging; uvicorn only configures its own loggers
+    logging.basicConfig(level=settings.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+
+    # Enable CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=Settings.split(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Include the chat router
+    app.include_router(chat_router)
+
+    # Liveness probe: answers as soon as the lifespan start-up has run
+    @app.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    return app
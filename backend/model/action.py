@@ -0,0 +1,38 @@
+from typing import Literal, Optional, Union
+
+from pydantic import BaseModel, Field, StringConstraints, TypeAdapter
+from typing_extensions import Annotated
+
+from config import get_settings
+
+# Longest chat message a player may send, in characters
+CHAT_MAX_CHARS = get_settings().chat_max_chars
+
+
+class ChatAction(BaseModel):
+    action: Literal["chat"]
+    message: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=CHAT_MAX_CHARS)]
+
+
+class VoteAction(BaseModel):
+    action: Literal["vote"]
+    voted_id: Optional[int] = None  # None abstains
+
+
+class PongAction(BaseModel):
+    action: Literal["pong"]
+
+
+ClientAction = Annotated[Union[ChatAction, VoteAction, PongAction], Field(discriminator="action")]
+client_action = TypeAdapter(ClientAction)
+
+
+def parse_action(data: dict) -> Optional[ClientAction]:
+    """
+    Validate a frame from a player. Returns None for frames that carry no
+    action, like the lobby's {"type": "join"} greeting, and raises
+    pydantic.ValidationError (a ValueError) for anything malformed.
+    """
+    if "action" not in data and "type" in data:
+        return None
+    return client_action.validate_python(data)
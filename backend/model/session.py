@@ -1,18 +1,145 @@
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from collections import deque
+from enum import Enum
+from pydantic import BaseModel, Field, field_validator
+from typing import Deque, Dict, List, Optional, Tuple
 from datetime import datetime
 from model.player import Player
 from model.message import Message
 
+# Number of chat messages kept in a session's rolling transcript
+TRANSCRIPT_SIZE = 100
+
+# Vote target recorded when a player abstains
+ABSTAIN = -1
+
+class GamePhase(str, Enum):
+    LOBBY = "lobby"
+    CHAT = "chat"
+    VOTING = "voting"
+    RESULTS = "results"
+
 class GameSession(BaseModel):
     session_id: str
     topic: str
-    players: List[Player] = []
-    messages: List[Message] = []
+    phase: GamePhase = GamePhase.LOBBY
+    players: Dict[int, Player] = {}  # Active players by ID
+    messages: Deque[Message] = Field(default_factory=lambda: deque(maxlen=TRANSCRIPT_SIZE))
+    message_count: int = 0  # Total messages ever appended to the transcript
     ai_player: Optional[Player] = None
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
-    votes: Dict[int, int] = {}
-    eliminated: List[Player] = []  # Eliminated players
+    votes: Dict[int, int] = {}  # Voter ID -> voted player ID
+    vote_counts: Dict[int, int] = {}  # Voted player ID -> number of votes, kept in step with votes
+    eliminated: Dict[int, Player] = {}  # Eliminated players by ID
+    last_activity: datetime = Field(default_factory=datetime.now)  # Last join, leave, chat, vote or phase change
+    next_player_id: int = 1  # Next human player ID; never reused, 0 is the AI
+    round: int = 0  # Current chat/vote round, 0 while in the lobby
+    tokens: Dict[str, int] = {}  # Resume token -> player ID
+    disconnected: Dict[int, datetime] = {}  # Player ID -> when their connection dropped, while they may still resume
+
+    @field_validator("messages", mode="after")
+    @classmethod
+    def bound_messages(cls, messages: Deque[Message]) -> Deque[Message]:
+        # Deserialized deques lose their maxlen; restore the ring buffer bound
+        if messages.maxlen != TRANSCRIPT_SIZE:
+            messages = deque(messages, maxlen=TRANSCRIPT_SIZE)
+        return messages
+
+    def add_message(self, message: Message):
+        """Append to the transcript, dropping the oldest message when full."""
+        self.messages.append(message)
+        self.message_count += 1
+        self.touch()
+
+    def touch(self):
+        self.last_activity = datetime.now()
+
+    def set_phase(self, phase: GamePhase):
+        self.phase = phase
+        self.touch()
+
+    def allocate_player_id(self) -> int:
+        """Hand out the next player ID. Call under the session's update lock."""
+        player_id = self.next_player_id
+        self.next_player_id += 1
+        return player_id
+
+    def add_player(self, player: Player):
+        self.players[player.id] = player
+        self.touch()
+
+    def remove_player(self, player_id: int) -> Optional[Player]:
+        """Remove a player who left, along with any votes by or for them."""
+        player = self.players.pop(player_id, None)
+        self.disconnected.pop(player_id, None)
+        self.tokens = {token: pid for token, pid in self.tokens.items() if pid != player_id}
+        self.touch()
+        self.withdraw_vote(player_id)
+        for voter_id in [v for v, target in self.votes.items() if target == player_id]:
+            self.withdraw_vote(voter_id)
+        return player
+
+    def eliminate(self, player_id: int) -> Optional[Player]:
+        """Move a player from the active players to the eliminated ones."""
+        player = self.players.pop(player_id, None)
+        if player:
+            self.eliminated[player_id] = player
+        return player
+
+    def cast_vote(self, voter_id: int, voted_id: int):
+        """Record a vote, replacing the voter's previous one, and update the tally."""
+        self.touch()
+        self.withdraw_vote(voter_id)
+        self.votes[voter_id] = voted_id
+        self.vote_counts[voted_id] = self.vote_counts.get(voted_id, 0) + 1
+
+    def start_round(self):
+        """Begin the next chat/vote round with an empty ballot."""
+        self.round += 1
+        self.votes = {}
+        self.vote_counts = {}
+        self.set_phase(GamePhase.CHAT)
+
+    def humans(self) -> List[Player]:
+        return [p for p in self.players.values() if not p.is_ai]
+
+    def voting_complete(self) -> bool:
+        """True once every human still in the game has voted or abstained."""
+        return len(self.votes) >= len(self.humans())
+
+    def resolve_votes(self) -> Tuple[Optional[int], str]:
+        """
+        Decide the round's elimination from the tally. Returns (player ID or None,
+        outcome): "eliminated", "no_votes", "abstained" when abstentions match or
+        beat the top candidate, or "tie" when several players share the most votes.
+        """
+        counts = {target: count for target, count in self.vote_counts.items() if target != ABSTAIN}
+        if not counts:
+            return None, "abstained" if self.vote_counts else "no_votes"
+        highest = max(counts.values())
+        if self.vote_counts.get(ABSTAIN, 0) >= highest:
+            return None, "abstained"
+        leaders = [target for target, count in counts.items() if count == highest]
+        if len(leaders) > 1:
+            return None, "tie"
+        return leaders[0], "eliminated"
+
+    def winner(self, max_rounds: int) -> Optional[str]:
+        """
+        "humans" once the AI is eliminated, "ai" once at most one human is left
+        or the last round has been played, None while the game goes on.
+        """
+        if self.ai_player and self.ai_player.id in self.eliminated:
+            return "humans"
+        if len(self.humans()) <= 1 or self.round >= max_rounds:
+            return "ai"
+        return None
 
-    
+    def withdraw_vote(self, voter_id: int):
+        previous = self.votes.pop(voter_id, None)
+        if previous is not None:
+            remaining = self.vote_counts[previous] - 1
+            if remaining:
+                self.vote_counts[previous] = remaining
+            else:
+                del self.vote_counts[previous]
@@ -1,80 +1,210 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from service.session_service import SessionService
+import logging
+import math
+import time
+from fastapi.responses import PlainTextResponse
+from model.action import ChatAction, PongAction, VoteAction, parse_action
+from service.session_service import (
+    GameInProgressError, SessionFullError, SessionService, reserved_session_id,
+)
+from service import metrics, wire
+from service.broadcaster import CLOSE_SESSION_OVER, Broadcaster
+from service.rate_limiter import TokenBucket
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+async def reject(websocket: WebSocket, encoding: str, message: str, code: int):
+    """Tell a connection why it cannot join, then close it."""
+    frame = wire.encode({"type": "error", "message": message}, encoding)
+    if isinstance(frame, bytes):
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+    await websocket.close(code=code)
 
 # Create a new session on /start
 @router.post("/start")
-def start_session():
-    session_id = SessionService.create_session()
+async def start_session():
+    session_id = await SessionService.create_session()
     return {"message": "Session started", "session_id": session_id}
 
+# Join any open game through matchmaking
+@router.post("/matchmaking/join")
+async def join_matchmaking():
+    """
+    Reserve a slot in the fullest open lobby (or a new one) and return its
+    session ID; connect to /ws/{session_id} to take the slot. Games start
+    automatically once the lobby is full.
+    """
+    session_id = await SessionService.join_queue()
+    return {"message": "Matched", "session_id": session_id, "max_players": SessionService.settings.game_max_players}
+
 # WebSocket Endpoint for Group Chat and Voting
 @router.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint to handle group chat and voting.
+
+    Frames are JSON text unless the client negotiates the compact msgpack
+    encoding (subprotocol "aimong.msgpack.v1" or ?encoding=msgpack).
+
+    New players get a "welcome" message with a resume token. A client that
+    drops can reconnect with ?token=...&last_seq=N within the grace period to
+    keep its seat and receive the broadcasts it missed. The server pings
+    every connection; clients answer {"action": "pong"} (any frame counts).
+
+    Incoming frames are checked before they reach the game: an oversized
+    frame closes the connection (the client may resume), frames beyond the
+    connection's rate are dropped, and malformed actions or chat over the
+    player's or room's rate limit get an error sent to the sender only.
     """
-    await websocket.accept()
+    encoding, subprotocol = wire.negotiate(
+        websocket.scope.get("subprotocols", []), websocket.query_params.get("encoding")
+    )
+    await websocket.accept(subprotocol=subprotocol)
+    if reserved_session_id(session_id):
+        await reject(websocket, encoding, "Invalid session ID.", 1008)
+        return
 
-    # Ensure session exists or create it
-    session = SessionService.get_or_create_session(session_id)
+    # Resume a dropped player's seat, or add a new player to the session
+    player = None
+    token = websocket.query_params.get("token")
+    if token:
+        # A resume token is only good for a session that still exists; don't
+        # bring an ended game back as a new, empty room
+        await SessionService.wait_recovered()
+        if not await SessionService.store.exists(session_id):
+            await reject(websocket, encoding, "This game has ended.", CLOSE_SESSION_OVER)
+            return
+        try:
+            last_seq = int(websocket.query_params.get("last_seq", "0"))
+        except ValueError:
+            last_seq = 0
+        player = await SessionService.resume_player(session_id, token, websocket, encoding, last_seq)
 
-    # Add player to the session
-    player = SessionService.add_player_to_session(session, websocket)
+    if player is None:
+        # Ensure session exists or create it
+        if not token:
+            await SessionService.get_or_create_session(session_id)
+        try:
+            player = await SessionService.add_player_to_session(session_id, websocket, encoding)
+        except (SessionFullError, GameInProgressError) as e:
+            await reject(websocket, encoding, str(e), 1008)
+            return
 
-    # Notify others about the new player
-    await SessionService.broadcast_message(session.session_id, {
-        "type": "player_join",
-        "message": f"{player.name} has joined the session."
-    })
+        # Notify others about the new player
+        await SessionService.broadcast_message(session_id, {
+            "type": "player_join",
+            "message": f"{player.name} has joined the session."
+        })
+        await SessionService.player_joined(session_id)
 
+    settings = SessionService.settings
+    frames = TokenBucket(settings.ws_frame_rate, settings.ws_frame_burst, time.monotonic())
     try:
         while True:
-            # Receive and handle incoming actions
-            data = await websocket.receive_json()
-            action = data.get("action")
-            if action == "chat":
+            # Receive and screen incoming frames; rejections are only sent to this client
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", 1000))
+            frame = received.get("text")
+            if frame is None:
+                frame = received.get("bytes") or b""
+            Broadcaster.touch(websocket)
+
+            # The limit is in bytes, and a text frame's characters may take up to 4 each
+            size = len(frame.encode()) if isinstance(frame, str) else len(frame)
+            if size > settings.ws_max_frame_bytes:
+                metrics.WS_REJECTED.inc(reason="too_large")
+                SessionService.send_message(websocket, {"type": "error", "message": "Message too large."})
+                Broadcaster.close_after_flush([websocket])
+                continue
+            if settings.ws_frame_rate > 0 and not frames.take(time.monotonic()):
+                metrics.WS_REJECTED.inc(reason="flood")
+                continue
+            try:
+                action = parse_action(wire.decode(frame, encoding))
+            except ValueError:
+                metrics.WS_REJECTED.inc(reason="invalid")
+                SessionService.send_message(websocket, {"type": "error", "message": "Invalid message."})
+                continue
+
+            if action is None or isinstance(action, PongAction):
+                continue
+            elif isinstance(action, ChatAction):
                 # Handle chat messages
-                await SessionService.handle_message(session, player, data.get("message"))
-            elif action == "vote":
+                wait = SessionService.chat_wait(session_id, player.id)
+                if wait:
+                    metrics.WS_REJECTED.inc(reason="rate_limited")
+                    SessionService.send_message(websocket, {
+                        "type": "error",
+                        "message": f"You're sending messages too fast. Try again in {math.ceil(wait)}s."
+                    })
+                    continue
+                if not await SessionService.handle_message(session_id, player, action.message):
+                    SessionService.send_message(websocket, {
+                        "type": "error",
+                        "message": "You are out of the game and can no longer chat."
+                    })
+            elif isinstance(action, VoteAction):
                 # Handle voting
-                voted_id = data.get("voted_id")
-                success = SessionService.cast_vote(session_id, player.id, voted_id)
+                # A missing or null voted_id abstains
+                voted_id = action.voted_id
+                success = await SessionService.cast_vote(session_id, player.id, voted_id)
                 if success:
                     await SessionService.broadcast_message(session_id, {
                         "type": "vote_cast",
-                        "message": f"{player.name} voted for Player {voted_id}."
+                        "message": f"{player.name} abstained." if voted_id is None
+                        else f"{player.name} voted for Player {voted_id}."
                     })
                 else:
-                    await websocket.send_json({
+                    SessionService.send_message(websocket, {
                         "type": "error",
                         "message": "Invalid vote. Please try again."
                     })
     except WebSocketDisconnect:
             try:
-                await SessionService.remove_player_from_session(session, player, websocket)
+                await SessionService.disconnect_player(session_id, player, websocket)
             except KeyError as e:
-                print(f"KeyError during player removal: {e}")  # Log the error for debugging
+                logger.warning("KeyError during player removal: %s", e)
 
 # Get the number of players in a session
 @router.get("/get_players/{session_id}")
-def get_player_count(session_id: str):
+async def get_player_count(session_id: str):
     """
     Retrieve the number of players in a session.
     """
     try:
-        player_count = SessionService.get_player_count(session_id)
-        return {"session_id": session_id, "player_count": player_count, "max_players": 5}
+        player_count = await SessionService.get_player_count(session_id)
+        return {"session_id": session_id, "player_count": player_count, "max_players": SessionService.settings.game_max_players}
     except ValueError as e:
         return {"error": str(e)}
 
+# Prometheus scrape endpoint
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Report latency histograms, failure counters and live gauges for this worker.
+    """
+    return await SessionService.collect_metrics()
+
+# Session lifecycle metrics (live sessions and their approximate size)
+@router.get("/metrics/sessions")
+def get_session_metrics():
+    """
+    Report live sessions and bytes as of the last reaper sweep.
+    """
+    return SessionService.session_metrics()
+
 @router.post("/start_game")
 async def start_game(session_id: str):
     """
     Start the game for the specified session and initiate the game timer.
     """
     try:
+        if reserved_session_id(session_id):
+            raise ValueError("Invalid session ID.")
         # Start the game
         await SessionService.start_game_for_session(session_id)
         return {"status": "Game started successfully", "session_id": session_id}
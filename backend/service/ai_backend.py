@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+from config import Settings, get_settings
+from service import metrics, ngram_model
+
+
+class AIBackend:
+    """
+    Produces the impostor's next message from the chat history rendered by
+    PromptBuilder (system prompt first, then user/assistant turns).
+    """
+    name = "base"
+
+    async def complete(self, messages: List[Dict]) -> str:
+        raise NotImplementedError
+
+    async def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        """Yield the reply in pieces; backends that cannot stream yield it whole."""
+        yield await self.complete(messages)
+
+    async def start(self):
+        """Called at application start-up; must not hold it up."""
+
+    async def close(self):
+        pass
+
+
+class HostedBackend(AIBackend):
+    """The fine-tuned model behind the chat completions API (see LLMClient)."""
+    name = "hosted"
+
+    def __init__(self, model: Optional[str] = None, settings: Optional[Settings] = None):
+        self.model = model or (settings or get_settings()).ai_model
+        self.preload: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Import the SDK in a thread while the worker already serves requests,
+        # rather than on the event loop at the first AI turn
+        from service.llm_client import LLMClient
+        self.preload = asyncio.create_task(asyncio.to_thread(LLMClient.preload))
+
+    async def complete(self, messages: List[Dict]) -> str:
+        from service.llm_client import LLMClient
+        return await LLMClient.complete(model=self.model, messages=messages)
+
+    async def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        from service.llm_client import LLMClient
+        async for delta in LLMClient.stream(model=self.model, messages=messages):
+            yield delta
+
+    async def close(self):
+        from service.llm_client import LLMClient
+        if self.preload is not None:
+            await asyncio.gather(self.preload, return_exceptions=True)
+        await LLMClient.close()
+
+
+class LocalBackend(AIBackend):
+    """
+    Offline impostor: the trigram chat model from ngram_model, run in a pool
+    of LOCAL_MODEL_WORKERS processes so generation never holds the event loop.
+    Each worker trains on the built-in seed corpus plus the files, directories
+    or game logs listed (comma-separated) in LOCAL_MODEL_CORPUS.
+    """
+    name = "local"
+
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.workers = settings.local_model_workers
+        self.corpus = [path for path in settings.local_model_corpus.split(",") if path]
+        self.context_messages = settings.local_model_context
+        self.timeout = settings.llm_timeout
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            # Spawned rather than forked, so workers don't inherit the event loop's threads
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=ngram_model.init_worker,
+                initargs=(self.corpus,),
+            )
+        return self.pool
+
+    async def start(self):
+        """Spawn and train the workers in the background, so the first replies aren't slower."""
+        pool = self.get_pool()
+        for _ in range(self.workers):
+            pool.submit(ngram_model.generate_reply, [])
+
+    async def complete(self, messages: List[Dict]) -> str:
+        context = [m["content"] for m in messages if m["role"] != "system"][-self.context_messages:]
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        reply = await asyncio.wait_for(
+            loop.run_in_executor(self.get_pool(), ngram_model.generate_reply, context), self.timeout
+        )
+        metrics.LLM_SECONDS.observe(time.perf_counter() - start, mode="local")
+        return reply
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = None
+
+
+def create_ai_backend(name: Optional[str] = None, settings: Optional[Settings] = None) -> AIBackend:
+    """Build the backend selected by AI_BACKEND ("hosted" or "local")."""
+    settings = settings or get_settings()
+    name = name or settings.ai_backend
+    if name == "hosted":
+        return HostedBackend(settings=settings)
+    if name == "local":
+        return LocalBackend(settings)
+    raise ValueError(f"Unknown AI backend: {name}")
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional
+
+from config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Scheduler policy: how likely the AI is to join in, and how long it "types"
+RESPONSE_PROBABILITY = 0.7
+ACCUSED_DELAY = (2, 4)
+REPLY_DELAY = (2, 6)
+
+
+class AIScheduler:
+    """
+    Decides when the AI speaks in one session.
+
+    Incoming messages only nudge the scheduler; a single task per session waits
+    for the chat to go quiet for a debounce window, applies the response policy
+    once for the whole burst, and then waits a human-like delay. Messages that
+    arrive during that delay make the pending reply stale, so the turn starts
+    over with the newer context (until the turn has waited `max_wait` seconds).
+    Only one completion per session is ever in flight.
+
+    `respond` is called with whether the turn answers an accusation.
+    `backpressure` (0 to 1) lowers the chance of an optional reply while the
+    shared LLM queue is backed up; accusations are answered regardless.
+    """
+
+    def __init__(self, session_id: str, respond: Callable[[bool], Awaitable[None]],
+                 backpressure: Callable[[], float] = lambda: 0.0, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.session_id = session_id
+        self.respond = respond
+        self.backpressure = backpressure
+        self.debounce = settings.ai_debounce
+        self.max_wait = settings.ai_max_wait
+        self.pending = asyncio.Event()
+        self.accused = False
+        self.turn_started: Optional[float] = None
+        self.task = asyncio.create_task(self._run())
+
+    def notify(self, accused: bool = False):
+        """Tell the scheduler a new chat message arrived. Never blocks."""
+        loop = asyncio.get_running_loop()
+        if self.turn_started is None:
+            self.turn_started = loop.time()
+        self.accused = self.accused or accused
+        self.pending.set()
+
+    async def _wait_for_message(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a new message. Returns True if one arrived."""
+        if timeout <= 0:
+            return False
+        try:
+            await asyncio.wait_for(self.pending.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.pending.wait()
+            self.pending.clear()
+
+            # Debounce: let a burst of messages settle into one turn
+            deadline = self.turn_started + self.max_wait
+            while await self._wait_for_message(min(self.debounce, deadline - loop.time())):
+                self.pending.clear()
+
+            # Accusations always get an answer; otherwise answer some of the time
+            if not self.accused and random.random() >= RESPONSE_PROBABILITY * (1 - self.backpressure()):
+                self._end_turn()
+                continue
+
+            # Natural delay; before max_wait is reached, a newer message makes this reply stale
+            low, high = ACCUSED_DELAY if self.accused else REPLY_DELAY
+            reply_at = loop.time() + random.uniform(low, high)
+            if loop.time() < deadline and await self._wait_for_message(min(reply_at, deadline) - loop.time()):
+                continue
+            if reply_at > loop.time():
+                await asyncio.sleep(reply_at - loop.time())
+
+            # Everything received so far is part of this reply
+            accused = self.accused
+            self._end_turn()
+            try:
+                await self.respond(accused)
+            except Exception:
+                logger.exception("AI scheduler error in session %s", self.session_id)
+
+    def _end_turn(self):
+        self.pending.clear()
+        self.accused = False
+        self.turn_started = None
+
+    def cancel(self):
+        """Stop the scheduler and drop any pending reply."""
+        self.task.cancel()
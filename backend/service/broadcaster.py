@@ -0,0 +1,213 @@
+import asyncio
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi import WebSocket
+
+from config import get_settings
+from service import metrics, wire
+
+# What to do with a connection whose outbound queue is full:
+#   "drop"    - close the connection, the client has fallen too far behind
+#   "compact" - discard the stale backlog, keep only the newest frames
+SLOW_CONSUMER_POLICIES = ("drop", "compact")
+
+# Queued in place of a frame to close the connection once everything before it is sent
+CLOSE_AFTER_FLUSH = None
+
+# Close codes: the client may reconnect and resume its seat (it fell behind or went
+# silent), or the session is over and there is nothing to resume
+CLOSE_RESUMABLE = 1013
+CLOSE_SESSION_OVER = 4000
+
+
+class ConnectionWriter:
+    """
+    Owns the outbound side of one WebSocket: a bounded queue of encoded frames
+    and a writer task draining it. Enqueueing never awaits, so a slow client
+    only ever delays its own frames.
+    """
+
+    def __init__(self, websocket: WebSocket, on_close: Optional[Callable[[WebSocket], None]] = None,
+                 encoding: str = wire.JSON):
+        settings = get_settings()
+        self.websocket = websocket
+        self.encoding = encoding
+        self.on_close = on_close
+        self.policy = settings.broadcast_slow_policy
+        if self.policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {self.policy}")
+        self.compact_keep = settings.broadcast_compact_keep
+        self.send_timeout = settings.broadcast_send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.broadcast_queue_size)
+        self.closed = False
+        self.close_code = CLOSE_RESUMABLE
+        self.send_started: Optional[float] = None
+        self.last_seen = asyncio.get_running_loop().time()  # Last frame received from the client
+        self.task = asyncio.create_task(self._run())
+
+    def enqueue(self, frame: wire.Frame) -> bool:
+        """Queue an encoded frame. Returns False if the connection is gone."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        stalled = (
+            self.send_started is not None
+            and asyncio.get_running_loop().time() - self.send_started > self.send_timeout
+        )
+        if self.policy == "drop" or stalled:
+            metrics.SEND_FAILURES.inc(reason="stalled" if stalled else "queue_full")
+            self.close()
+            return False
+
+        # Compact: keep the newest frames and tell the client how many it missed
+        backlog = []
+        while not self.queue.empty():
+            backlog.append(self.queue.get_nowait())
+        backlog.append(frame)
+        kept = backlog[-min(self.compact_keep, self.queue.maxsize - 1):]
+        dropped = len(backlog) - len(kept)
+        metrics.SEND_FAILURES.inc(dropped, reason="compacted")
+        self.queue.put_nowait(wire.encode({
+            "type": "backlog_compacted",
+            "message": f"{dropped} message(s) were skipped because the connection fell behind."
+        }, self.encoding))
+        for queued in kept:
+            self.queue.put_nowait(queued)
+        return True
+
+    async def _run(self):
+        try:
+            loop = asyncio.get_running_loop()
+            while True:
+                frame = await self.queue.get()
+                if frame is CLOSE_AFTER_FLUSH:
+                    self.close(self.close_code)
+                    return
+                self.send_started = loop.time()
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                self.send_started = None
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Send failed; the socket is dead
+            metrics.SEND_FAILURES.inc(reason="send_error")
+            self.close()
+
+    def close(self, code: int = CLOSE_RESUMABLE):
+        """Stop writing to the connection and close it."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+        asyncio.create_task(self._close_websocket(code))
+        if self.on_close:
+            self.on_close(self.websocket)
+
+    async def _close_websocket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+class Broadcaster:
+    """
+    Fan-out engine for session broadcasts. Each message is encoded once per
+    wire encoding in use and handed to the per-connection writers without
+    awaiting any of them.
+    """
+    writers: Dict[WebSocket, ConnectionWriter] = {}
+
+    @classmethod
+    def register(cls, websocket: WebSocket, on_close: Optional[Callable[[WebSocket], None]] = None,
+                 encoding: str = wire.JSON) -> ConnectionWriter:
+        def closed(ws: WebSocket):
+            cls.writers.pop(ws, None)
+            if on_close:
+                on_close(ws)
+
+        writer = ConnectionWriter(websocket, closed, encoding)
+        cls.writers[websocket] = writer
+        return writer
+
+    @classmethod
+    def unregister(cls, websocket: WebSocket):
+        writer = cls.writers.pop(websocket, None)
+        if writer and not writer.closed:
+            # The socket is already going away; just stop the writer task
+            writer.closed = True
+            writer.task.cancel()
+
+    @classmethod
+    def publish(cls, websockets: Iterable[WebSocket], message: dict) -> int:
+        """Queue a message for every connection. Returns how many accepted it."""
+        frames: Dict[str, wire.Frame] = {}
+        delivered = 0
+        with metrics.FANOUT_SECONDS.time():
+            for websocket in list(websockets):
+                writer = cls.writers.get(websocket)
+                if not writer:
+                    continue
+                frame = frames.get(writer.encoding)
+                if frame is None:
+                    frame = frames[writer.encoding] = wire.encode(message, writer.encoding)
+                if writer.enqueue(frame):
+                    delivered += 1
+        metrics.FANOUT_CONNECTIONS.inc(delivered)
+        return delivered
+
+    @classmethod
+    def close_after_flush(cls, websockets: Iterable[WebSocket], code: int = CLOSE_RESUMABLE):
+        """Close the connections with `code` once their already queued frames are sent."""
+        for websocket in list(websockets):
+            writer = cls.writers.get(websocket)
+            if writer is None:
+                continue
+            writer.close_code = code
+            if not writer.enqueue(CLOSE_AFTER_FLUSH):
+                writer.close(code)
+
+    @classmethod
+    def touch(cls, websocket: WebSocket):
+        """Note that the client sent something, so the connection is alive."""
+        writer = cls.writers.get(websocket)
+        if writer:
+            writer.last_seen = asyncio.get_running_loop().time()
+
+    @classmethod
+    def heartbeat(cls, timeout: float) -> int:
+        """
+        Ping every connection and close the ones that have not sent anything
+        (pongs included) for `timeout` seconds. Returns how many were closed.
+        """
+        now = asyncio.get_running_loop().time()
+        frames: Dict[str, wire.Frame] = {}
+        closed = 0
+        for writer in list(cls.writers.values()):
+            if now - writer.last_seen > timeout:
+                metrics.SEND_FAILURES.inc(reason="heartbeat_timeout")
+                writer.close()
+                closed += 1
+                continue
+            frame = frames.get(writer.encoding)
+            if frame is None:
+                frame = frames[writer.encoding] = wire.encode({"type": "ping"}, writer.encoding)
+            writer.enqueue(frame)
+        return closed
+
+    @classmethod
+    def send(cls, websocket: WebSocket, message: dict) -> bool:
+        """Queue a message for a single connection, keeping its frame order."""
+        writer = cls.writers.get(websocket)
+        if not writer:
+            return False
+        return writer.enqueue(wire.encode(message, writer.encoding))
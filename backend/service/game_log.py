@@ -0,0 +1,217 @@
+"""
+Append-only log of game events, one JSON object per line.
+
+Every change to a session's state is recorded as an event:
+
+    {"t": 1737459812.41, "s": "3", "e": "chat", "id": 2, "name": "Player 2", "text": "hi"}
+
+    create    topic, ai (the AI player or null)
+    join      player, token           (the player's resume token)
+    leave     id
+    chat      id, name, text          (a human message)
+    ai_reply  id, name, text          (the AI's message)
+    vote      voter, voted
+    round     round, start, end       (a new chat round with an empty ballot)
+    phase     phase
+    eliminate id
+    end       reason
+
+Each session gets its own file, session-<id>.jsonl, under GAME_LOG_DIR.
+Once its "end" event is written the file is moved to
+finished/session-<id>-<ms>.jsonl, so GAME_LOG_DIR itself only holds the
+games still in progress, which is all recovery has to read. If an ID is
+reused before that, the file continues with a new "create" event, which
+resets the state on replay. Events are buffered in memory and written in batches
+on a worker thread, so logging never blocks the event loop. replay() folds
+events back into a GameSession; tools/replay_game.py does this from the
+command line.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import Settings, get_settings
+from model.message import Message
+from model.player import Player
+from model.session import GamePhase, GameSession
+
+logger = logging.getLogger(__name__)
+
+Event = dict
+
+# Subdirectory of GAME_LOG_DIR that logs of ended games are moved to
+FINISHED_DIR = "finished"
+
+
+def log_path(directory: str, session_id: str) -> str:
+    return os.path.join(directory, f"session-{session_id}.jsonl")
+
+
+def finished_path(directory: str, session_id: str, ended: float) -> str:
+    return os.path.join(directory, FINISHED_DIR, f"session-{session_id}-{int(ended * 1000)}.jsonl")
+
+
+def read_events(path: str) -> Iterator[Event]:
+    """Read a session log, skipping a torn last line left by a crash."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def apply_event(session: Optional[GameSession], event: Event) -> Optional[GameSession]:
+    """Apply one event to a session and return it (a "create" event starts a new one)."""
+    kind = event["e"]
+    at = datetime.fromtimestamp(event["t"])
+    if kind == "create":
+        session = GameSession(session_id=event["s"], topic=event["topic"])
+        if event.get("ai"):
+            session.ai_player = Player(**event["ai"])
+            session.add_player(session.ai_player)
+    elif session is None:
+        return None
+    elif kind == "join":
+        player = Player(**event["player"])
+        session.add_player(player)
+        session.next_player_id = max(session.next_player_id, player.id + 1)
+        if event.get("token"):
+            session.tokens[event["token"]] = player.id
+    elif kind == "leave":
+        session.remove_player(event["id"])
+    elif kind in ("chat", "ai_reply"):
+        session.add_message(Message(sender_id=event["id"], sender_name=event["name"], content=event["text"], timestamp=at))
+    elif kind == "vote":
+        session.cast_vote(event["voter"], event["voted"])
+    elif kind == "round":
+        session.start_round()
+        session.round = event["round"]
+        session.start_time = datetime.fromtimestamp(event["start"])
+        session.end_time = datetime.fromtimestamp(event["end"])
+    elif kind == "phase":
+        session.set_phase(GamePhase(event["phase"]))
+    elif kind == "eliminate":
+        session.eliminate(event["id"])
+    session.last_activity = at
+    return session
+
+
+def replay(events: Iterable[Event], until: Optional[float] = None, count: Optional[int] = None) -> Optional[GameSession]:
+    """
+    Rebuild the session from its events, stopping after `count` events or at
+    the first event later than the `until` timestamp. Returns None if no game
+    has been created by then.
+    """
+    session = None
+    for index, event in enumerate(events):
+        if count is not None and index >= count:
+            break
+        if until is not None and event["t"] > until:
+            break
+        session = apply_event(session, event)
+    return session
+
+
+class GameLog:
+    """
+    Buffered writer for the game event log. record() only appends to an
+    in-memory buffer; a background task hands the buffer to a thread every
+    GAME_LOG_FLUSH_INTERVAL seconds, or sooner once GAME_LOG_BATCH events
+    are waiting. Logging is disabled when GAME_LOG_DIR is empty.
+    """
+
+    def __init__(self, directory: Optional[str] = None, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.directory = directory if directory is not None else settings.game_log_dir
+        self.flush_interval = settings.game_log_flush_interval
+        self.batch_size = settings.game_log_batch
+        self.buffer: List[Event] = []
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def record(self, session_id: str, kind: str, **fields):
+        if not self.enabled:
+            return
+        self.buffer.append({"t": round(datetime.now().timestamp(), 3), "s": session_id, "e": kind, **fields})
+        if len(self.buffer) >= self.batch_size:
+            self.wakeup.set()
+
+    def start(self):
+        if self.enabled and (self.task is None or self.task.done()):
+            os.makedirs(os.path.join(self.directory, FINISHED_DIR), exist_ok=True)
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except OSError as e:
+            logger.error("Failed to write %d game log event(s): %s", len(batch), e)
+
+    def _write(self, batch: List[Event]):
+        lines: Dict[str, List[str]] = defaultdict(list)
+        last: Dict[str, Event] = {}
+        for event in batch:
+            lines[event["s"]].append(json.dumps(event, separators=(",", ":")) + "\n")
+            last[event["s"]] = event
+        for session_id, session_lines in lines.items():
+            path = log_path(self.directory, session_id)
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(session_lines)
+            if last[session_id]["e"] == "end":
+                os.replace(path, finished_path(self.directory, session_id, last[session_id]["t"]))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        await self.flush()
+
+    async def recover(self) -> List[GameSession]:
+        """
+        Rebuild every game that was still running when the log was last
+        written. Only the open logs in GAME_LOG_DIR are read, not finished/.
+        """
+        if not self.enabled or not os.path.isdir(self.directory):
+            return []
+        return await asyncio.to_thread(self._recover)
+
+    def _recover(self) -> List[GameSession]:
+        sessions = []
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith("session-") and name.endswith(".jsonl")):
+                continue
+            path = os.path.join(self.directory, name)
+            events = list(read_events(path))
+            if not events:
+                continue
+            if events[-1]["e"] == "end":
+                # Ended just before a crash, or logged before ended games were moved
+                session_id = name[len("session-"):-len(".jsonl")]
+                os.makedirs(os.path.join(self.directory, FINISHED_DIR), exist_ok=True)
+                os.replace(path, finished_path(self.directory, session_id, events[-1]["t"]))
+                continue
+            session = replay(events)
+            if session is not None:
+                sessions.append(session)
+        return sessions
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from config import get_settings
+from service import metrics
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+class LLMClient:
+    """
+    Process-wide async client for the chat completions endpoint.
+
+    A single pooled HTTP client is shared by every session, each call is awaited
+    with its own timeout, and a semaphore caps how many completions are in flight
+    at once so a slow provider cannot starve the event loop of connections.
+    Point OPENAI_BASE_URL at tools/llm_stub.py to run against a local stub.
+
+    The SDK takes a good part of a second to import, so it is only imported
+    when the hosted backend is in use (see preload).
+    """
+    _client: Optional["AsyncOpenAI"] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    def preload():
+        """Import the SDK ahead of the first call; safe to run in a worker thread."""
+        import httpx  # noqa: F401
+        import openai  # noqa: F401
+
+    @classmethod
+    def get_client(cls) -> "AsyncOpenAI":
+        """Return the shared client, creating it on first use."""
+        if cls._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            settings = get_settings()
+            max_connections = settings.llm_max_connections
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=settings.llm_timeout,
+            )
+            cls._client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url or None,
+                max_retries=settings.llm_max_retries,
+                http_client=http_client,
+            )
+        return cls._client
+
+    @classmethod
+    def get_semaphore(cls) -> asyncio.Semaphore:
+        if cls._semaphore is None:
+            cls._semaphore = asyncio.Semaphore(get_settings().llm_max_concurrency)
+        return cls._semaphore
+
+    @classmethod
+    async def complete(cls, model: str, messages: List[Dict], timeout: Optional[float] = None) -> str:
+        """
+        Request a single completion and return the text of the first choice.
+
+        Raises asyncio.TimeoutError if the call (including time spent waiting for a
+        free slot) takes longer than `timeout` seconds.
+        """
+        if timeout is None:
+            timeout = get_settings().llm_timeout
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(cls._complete(model, messages, timeout), timeout)
+        except asyncio.TimeoutError:
+            metrics.LLM_ERRORS.inc(reason="timeout")
+            raise
+        except Exception:
+            metrics.LLM_ERRORS.inc(reason="error")
+            raise
+        finally:
+            metrics.LLM_SECONDS.observe(time.perf_counter() - start, mode="complete")
+
+    @classmethod
+    async def _complete(cls, model: str, messages: List[Dict], timeout: float) -> str:
+        client = cls.get_client()
+        async with cls.get_semaphore():
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=timeout,
+            )
+        if response.usage:
+            metrics.LLM_TOKENS.inc(response.usage.prompt_tokens, kind="prompt")
+            metrics.LLM_TOKENS.inc(response.usage.completion_tokens, kind="completion")
+        return response.choices[0].message.content or ""
+
+    @classmethod
+    async def stream(cls, model: str, messages: List[Dict], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream a completion, yielding text deltas as they arrive. `timeout`
+        bounds the wait for the response to start; the concurrency slot is held
+        until the stream is exhausted or closed.
+        """
+        if timeout is None:
+            timeout = get_settings().llm_timeout
+        client = cls.get_client()
+        start = time.perf_counter()
+        try:
+            async with cls.get_semaphore():
+                response = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        timeout=timeout,
+                    ),
+                    timeout,
+                )
+                metrics.LLM_SECONDS.observe(time.perf_counter() - start, mode="stream_first_token")
+                async with response:
+                    async for chunk in response:
+                        if chunk.usage:
+                            metrics.LLM_TOKENS.inc(chunk.usage.prompt_tokens, kind="prompt")
+                            metrics.LLM_TOKENS.inc(chunk.usage.completion_tokens, kind="completion")
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+        except asyncio.TimeoutError:
+            metrics.LLM_ERRORS.inc(reason="timeout")
+            raise
+        except Exception:
+            metrics.LLM_ERRORS.inc(reason="error")
+            raise
+        finally:
+            metrics.LLM_SECONDS.observe(time.perf_counter() - start, mode="stream")
+
+    @classmethod
+    async def close(cls):
+        """Close the pooled HTTP connections (call on application shutdown)."""
+        if cls._client is not None:
+            await cls._client.close()
+        cls._client = None
+        cls._semaphore = None
@@ -0,0 +1,136 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+
+from config import Settings, get_settings
+from service import metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first: answering an accusation matters more than joining in on small talk
+PRIORITY_ACCUSED = 0
+PRIORITY_CHAT = 1
+
+
+class LLMDispatcher:
+    """
+    Hands out completion slots to every session's AI from one shared pool.
+
+    Requests that arrive within LLM_BATCH_WINDOW of each other are collected
+    before any is granted, so a burst is served in priority order rather than
+    arrival order. At most `limit` completions run at once. The limit halves
+    when the provider answers 429 (dispatch pauses for its Retry-After) and
+    grows back by one after each `limit` successful calls. A request that
+    waits longer than LLM_QUEUE_MAX_WAIT is dropped, since by then the chat
+    has moved on. pressure() reports how backed up the queue is, so
+    schedulers can skip optional replies.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.max_workers = settings.llm_max_concurrency
+        self.limit = self.max_workers
+        self.window = settings.llm_batch_window
+        self.max_queue_wait = settings.llm_queue_max_wait
+        self.backoff = settings.llm_rate_limit_backoff
+        self.heap: List[Tuple[int, int, asyncio.Future]] = []
+        self.counter = itertools.count()
+        self.active = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_CHAT) -> AsyncIterator[None]:
+        """
+        Wait for a free slot, then hold it for the body of the block.
+        Raises asyncio.TimeoutError if no slot frees up within LLM_QUEUE_MAX_WAIT.
+        """
+        granted = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.heap, (priority, next(self.counter), granted))
+        self._ensure_running()
+        self.wakeup.set()
+        try:
+            await asyncio.wait_for(granted, self.max_queue_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if granted.done() and not granted.cancelled():
+                # Granted just as the caller gave up; hand the slot back
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.LLM_DROPPED.inc()
+            raise
+
+        try:
+            yield
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                self._rate_limited(e)
+            raise
+        else:
+            self._succeeded()
+        finally:
+            self._release()
+
+    def _release(self):
+        self.active -= 1
+        self.wakeup.set()
+
+    def pressure(self) -> float:
+        """0 when requests are served right away, 1 when the queue is at least twice the pool."""
+        if asyncio.get_running_loop().time() < self.paused_until:
+            return 1.0
+        return min(1.0, len(self.heap) / (2 * self.limit))
+
+    def _rate_limited(self, error: Exception):
+        metrics.LLM_RATE_LIMITED.inc()
+        self.limit = max(1, self.limit // 2)
+        self.successes = 0
+        delay = self.backoff
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                delay = float(response.headers.get("retry-after", delay))
+            except ValueError:
+                pass
+        loop = asyncio.get_running_loop()
+        self.paused_until = max(self.paused_until, loop.time() + delay)
+        logger.warning("LLM rate limited; pausing for %.1fs with %d worker(s)", delay, self.limit)
+
+    def _succeeded(self):
+        self.successes += 1
+        if self.limit < self.max_workers and self.successes >= self.limit:
+            self.limit += 1
+            self.successes = 0
+
+    def _ensure_running(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            if not self.heap or self.active >= self.limit:
+                continue
+
+            # Let the burst gather so the most urgent request goes first
+            await asyncio.sleep(self.window)
+            if loop.time() < self.paused_until:
+                await asyncio.sleep(self.paused_until - loop.time())
+
+            while self.heap and self.active < self.limit:
+                _, _, granted = heapq.heappop(self.heap)
+                if granted.done():
+                    continue  # Gave up waiting
+                self.active += 1
+                granted.set_result(None)
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+        self.task = None
@@ -0,0 +1,117 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import Settings, get_settings
+from service import metrics
+
+
+class Matchmaker:
+    """
+    Index of this worker's open matchmaking lobbies, bucketed by free slots.
+
+    Placing a player takes the first lobby from the fullest non-full bucket,
+    so rooms fill up (and start) as fast as possible. With one bucket per
+    possible free-slot count, placement, joins and leaves are O(1)
+    regardless of how many lobbies are open. A placed player holds a
+    reservation until their WebSocket joins; reservations left unused for
+    MATCH_RESERVATION_TTL seconds are handed back to the lobby.
+
+    Only lobbies created by matchmaking are indexed. Private lobbies from
+    /start are never filled with strangers.
+    """
+
+    def __init__(self, max_players: int, settings: Optional[Settings] = None):
+        self.max_players = max_players
+        self.reservation_ttl = (settings or get_settings()).match_reservation_ttl
+        # buckets[n] holds the lobbies with exactly n free slots, oldest first
+        self.buckets: List[OrderedDict] = [OrderedDict() for _ in range(max_players + 1)]
+        self.players: Dict[str, int] = {}
+        # Expiry times of each lobby's outstanding reservations, oldest first
+        self.reserved: Dict[str, Deque[float]] = {}
+        self.free: Dict[str, int] = {}
+        # (expiry, session ID) across all lobbies, in the order reservations were made
+        self.expiries: Deque[Tuple[float, str]] = deque()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.free
+
+    def open_lobbies(self) -> int:
+        return len(self.free)
+
+    def reservations(self) -> int:
+        return sum(len(r) for r in self.reserved.values())
+
+    def add(self, session_id: str, players: int):
+        """Start tracking a new matchmaking lobby."""
+        self.players[session_id] = players
+        self.reserved[session_id] = deque()
+        metrics.MATCH_EVENTS.inc(event="lobby_opened")
+        self._reindex(session_id)
+
+    def remove(self, session_id: str):
+        """Stop offering a lobby (its game started or it was closed)."""
+        free = self.free.pop(session_id, None)
+        if free is not None:
+            self.buckets[free].pop(session_id, None)
+        self.players.pop(session_id, None)
+        self.reserved.pop(session_id, None)
+
+    def place(self, now: float) -> Optional[str]:
+        """Reserve a slot in the fullest open lobby. Returns None if every lobby is full."""
+        self._expire(now)
+        for free in range(1, self.max_players + 1):
+            bucket = self.buckets[free]
+            if bucket:
+                session_id = next(iter(bucket))
+                self.reserve(session_id, now)
+                return session_id
+        return None
+
+    def reserve(self, session_id: str, now: float):
+        expiry = now + self.reservation_ttl
+        self.reserved[session_id].append(expiry)
+        self.expiries.append((expiry, session_id))
+        metrics.MATCH_EVENTS.inc(event="placed")
+        self._reindex(session_id)
+
+    def joined(self, session_id: str, players: int) -> bool:
+        """
+        Record a player joining a tracked lobby, using up one of its reservations.
+        Returns True if the lobby is now full.
+        """
+        if session_id not in self.free:
+            return False
+        self.players[session_id] = players
+        if self.reserved[session_id]:
+            self.reserved[session_id].popleft()
+        self._reindex(session_id)
+        return players >= self.max_players
+
+    def left(self, session_id: str, players: int):
+        if session_id in self.free:
+            self.players[session_id] = players
+            self._reindex(session_id)
+
+    def _expire(self, now: float):
+        # Joins use up a lobby's oldest reservation, so whatever is still
+        # outstanding and past its expiry was never used
+        while self.expiries and self.expiries[0][0] <= now:
+            _, session_id = self.expiries.popleft()
+            reserved = self.reserved.get(session_id)
+            expired = 0
+            while reserved and reserved[0] <= now:
+                reserved.popleft()
+                expired += 1
+            if expired:
+                metrics.MATCH_EVENTS.inc(expired, event="reservation_expired")
+                self._reindex(session_id)
+
+    def _reindex(self, session_id: str):
+        free = max(0, self.max_players - self.players[session_id] - len(self.reserved[session_id]))
+        previous = self.free.get(session_id)
+        if previous == free:
+            return
+        if previous is not None:
+            self.buckets[previous].pop(session_id, None)
+        self.free[session_id] = free
+        self.buckets[free][session_id] = None
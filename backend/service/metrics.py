@@ -0,0 +1,240 @@
+"""
+In-process instrumentation, exposed in the Prometheus text format on /metrics.
+
+Metrics are plain module-level objects so the hot paths can record into them
+without any lookup:
+
+    metrics.LLM_SECONDS.observe(elapsed, mode="complete")
+    metrics.SEND_FAILURES.inc(reason="stalled")
+
+    @classmethod
+    @metrics.timed("cast_vote")
+    async def cast_vote(cls, ...): ...
+
+Everything is per worker; with several workers, scrape each one and let
+Prometheus sum them. Recording never awaits and never raises.
+"""
+import asyncio
+import bisect
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from a fast in-memory fan-out to a slow LLM call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{label}="{value}"' for label, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self.values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = self._format_labels(key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += counts[-1]
+            le = self._format_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total[0]}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+
+def render() -> str:
+    """The whole registry in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+HANDLER_SECONDS = Histogram(
+    "aimong_handler_seconds", "Time spent in instrumented service calls.", ["handler"])
+HANDLER_ERRORS = Counter(
+    "aimong_handler_errors_total", "Instrumented service calls that raised.", ["handler"])
+FANOUT_SECONDS = Histogram(
+    "aimong_broadcast_fanout_seconds", "Time to encode a broadcast and queue it on this worker's connections.")
+FANOUT_CONNECTIONS = Counter(
+    "aimong_broadcast_frames_total", "Frames queued on connections by broadcasts.")
+SEND_FAILURES = Counter(
+    "aimong_send_failures_total", "Connections dropped or frames skipped while sending.", ["reason"])
+LLM_SECONDS = Histogram(
+    "aimong_llm_seconds", "Latency of chat completion calls.", ["mode"])
+LLM_ERRORS = Counter(
+    "aimong_llm_errors_total", "Chat completion calls that failed.", ["reason"])
+LLM_TOKENS = Counter(
+    "aimong_llm_tokens_total", "Tokens reported by the completion endpoint.", ["kind"])
+LLM_RATE_LIMITED = Counter(
+    "aimong_llm_rate_limited_total", "Completions rejected by the provider with 429.")
+LLM_DROPPED = Counter(
+    "aimong_llm_dropped_total", "AI replies dropped after waiting too long for a completion slot.")
+LLM_QUEUE_DEPTH = Gauge(
+    "aimong_llm_queue_depth", "AI replies waiting for a completion slot.")
+LLM_WORKERS = Gauge(
+    "aimong_llm_workers", "Completion slots currently allowed (shrinks under rate limiting).")
+MATCH_OPEN_LOBBIES = Gauge(
+    "aimong_matchmaking_open_lobbies", "Matchmaking lobbies on this worker that have not started yet.")
+MATCH_RESERVATIONS = Gauge(
+    "aimong_matchmaking_reservations", "Slots reserved for matched players who have not connected yet.")
+MATCH_EVENTS = Counter(
+    "aimong_matchmaking_events_total", "Players placed, lobbies opened, reservations expired and games auto-started.", ["event"])
+WS_REJECTED = Counter(
+    "aimong_ws_rejected_frames_total", "Client frames refused before reaching the game, by reason.", ["reason"])
+AI_REPLIES = Counter(
+    "aimong_ai_replies_total", "AI replies sent, by where the text came from.", ["source"])
+RESPONSE_CACHE_HIT_RATIO = Gauge(
+    "aimong_response_cache_hit_ratio", "Share of response cache lookups on this worker answered from the cache.")
+SCHEDULER_LAG = Histogram(
+    "aimong_scheduler_lag_seconds", "How late phase transitions fired after their deadline.")
+LOOP_LAG = Histogram(
+    "aimong_event_loop_lag_seconds", "How late the event loop monitor woke up.")
+LOOP_BLOCKED = Counter(
+    "aimong_event_loop_blocked_total", "Times the event loop was blocked longer than LOOP_BLOCK_THRESHOLD.")
+ACTIVE_SESSIONS = Gauge(
+    "aimong_active_sessions", "Sessions in the store.")
+ACTIVE_PLAYERS = Gauge(
+    "aimong_active_players", "Players connected to this worker.")
+ACTIVE_WEBSOCKETS = Gauge(
+    "aimong_active_websockets", "WebSocket writers open on this worker.")
+
+
+def timed(handler: str):
+    """Decorator recording an async function's latency (and errors) under `handler`."""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                HANDLER_ERRORS.inc(handler=handler)
+                raise
+            finally:
+                HANDLER_SECONDS.observe(time.perf_counter() - start, handler=handler)
+        return wrapper
+    return decorate
+
+
+class LoopMonitor:
+    """
+    Detects event loop blocking: a task sleeps for a fixed interval and records
+    how much later than that it actually woke up. Anything over the threshold
+    means some callback held the loop (e.g. sync I/O or heavy CPU work).
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.interval = settings.loop_monitor_interval
+        self.threshold = settings.loop_block_threshold
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            LOOP_LAG.observe(lag)
+            if lag > self.threshold:
+                LOOP_BLOCKED.inc()
+                logger.warning("Event loop was blocked for %.3fs", lag)
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+        self.task = None
@@ -0,0 +1,136 @@
+"""
+CPU-only impostor: a word-level trigram model of casual group chat.
+
+It is trained at worker start-up on a small built-in seed corpus, plus
+any text files or game logs listed in LOCAL_MODEL_CORPUS. Replies start
+from a word of the latest message when the model has seen that word, so
+they stay loosely on topic. A few human-like quirks (dropped letters,
+doubled letters) are added afterwards. The model is tiny and has no
+dependencies, so it runs in a few milliseconds in a process pool worker.
+"""
+import json
+import logging
+import os
+import random
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+START = "<s>"
+END = "</s>"
+MAX_WORDS = 14
+
+SEED_CORPUS = [
+    "lol same", "wait what", "ngl thats kinda sus", "idk man", "who even says that",
+    "hahaha true", "bro why u typing so fast", "i think its player 3 tbh",
+    "nah i dont think so", "ok but who is the ai", "that sounded like a bot ngl",
+    "what u guys doing later", "im so tired today", "lol i just woke up",
+    "eh the ai would say that", "why so quiet", "sus sus sus", "hmm i dunno",
+    "wait is this the chat", "lmao ok", "i was gonna say that", "so who we voting",
+    "ya lor", "i think its the quiet one", "that reply was too perfect", "ok im human btw",
+    "bro relax", "ok ok fair", "hahah", "ya true", "what did u eat today",
+    "nah its not me", "the ai is probably watching us rn", "lol who said that",
+    "wait whos player 2", "i vote the one who said hi first", "ok this is fun",
+    "i cant tell anymore", "ngl everyone sounds sus", "same here", "wah",
+]
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9']+|[?!]", text.lower())
+
+
+def corpus_lines(paths: Iterable[str]) -> Iterable[str]:
+    """Lines from plain text files, or human chat messages from game logs (.jsonl)."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from corpus_lines(os.path.join(path, name) for name in sorted(os.listdir(path)))
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if path.endswith(".jsonl"):
+                        try:
+                            event = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if event.get("e") == "chat":
+                            yield event["text"]
+                    elif line.strip():
+                        yield line.strip()
+        except OSError as e:
+            logger.warning("Skipping local model corpus %s: %s", path, e)
+
+
+class NGramModel:
+    def __init__(self):
+        self.transitions: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        # Word -> contexts that end in it, for starting a reply from a given word
+        self.contexts: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+
+    def train(self, lines: Iterable[str]):
+        for line in lines:
+            words = [START, START] + tokenize(line) + [END]
+            if len(words) == 3:
+                continue
+            for i in range(len(words) - 2):
+                context = (words[i], words[i + 1])
+                if not self.transitions[context]:
+                    self.contexts[words[i + 1]].append(context)
+                self.transitions[context][words[i + 2]] += 1
+
+    def generate(self, prompt: str, rng: random.Random) -> str:
+        # Start from a word of the prompt the model knows, otherwise from a sentence start
+        known = [w for w in tokenize(prompt) if w in self.contexts and len(w) > 2]
+        if known and rng.random() < 0.6:
+            context = rng.choice(self.contexts[rng.choice(known)])
+        else:
+            context = (START, START)
+        words = [] if context[1] == START else [context[1]]
+
+        while len(words) < MAX_WORDS:
+            options = self.transitions.get(context)
+            if not options:
+                break
+            word = rng.choices(list(options), weights=list(options.values()))[0]
+            if word == END:
+                break
+            words.append(word)
+            context = (context[1], word)
+        return humanize(" ".join(words), rng) if words else "lol"
+
+
+def humanize(text: str, rng: random.Random) -> str:
+    """Add the odd typo: a dropped or doubled letter in one word."""
+    words = text.split(" ")
+    roll = rng.random()
+    index = rng.randrange(len(words))
+    word = words[index]
+    if len(word) > 3 and roll < 0.15:
+        cut = rng.randrange(1, len(word) - 1)
+        words[index] = word[:cut] + word[cut + 1:]
+    elif len(word) > 2 and roll < 0.25:
+        words[index] = word + word[-1]
+    return " ".join(words)
+
+
+# Per-process state for pool workers
+_model: Optional[NGramModel] = None
+_rng = random.Random()
+
+
+def init_worker(corpus_paths: List[str]):
+    """Process pool initializer: train the model once per worker."""
+    global _model
+    _model = NGramModel()
+    _model.train(SEED_CORPUS)
+    _model.train(corpus_lines(corpus_paths))
+
+
+def generate_reply(context: List[str]) -> str:
+    """Reply to the latest chat lines ("Player 2: hi" style). Runs in a pool worker."""
+    if _model is None:
+        init_worker([])
+    latest = context[-1].split(": ", 1)[-1] if context else ""
+    return _model.generate(latest, _rng)
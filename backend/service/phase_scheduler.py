@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from service import metrics
+
+logger = logging.getLogger(__name__)
+
+PhaseCallback = Callable[[], Awaitable[None]]
+
+
+class Clock:
+    """Monotonic wall clock used by the scheduler in production."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    async def wait(self, event: asyncio.Event, timeout: Optional[float]):
+        """Wait until `event` is set or `timeout` seconds pass."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class ManualClock(Clock):
+    """Clock that only moves when advance() is called, for driving games in tests."""
+
+    def __init__(self, start: float = 0.0):
+        self.time = start
+        self.waiting: Set[asyncio.Event] = set()
+
+    def now(self) -> float:
+        return self.time
+
+    async def wait(self, event: asyncio.Event, timeout: Optional[float]):
+        self.waiting.add(event)
+        try:
+            await event.wait()
+        finally:
+            self.waiting.discard(event)
+
+    def advance(self, seconds: float):
+        self.time += seconds
+        for event in list(self.waiting):
+            event.set()
+
+
+class PhaseScheduler:
+    """
+    Drives the timed phase transitions of every session from a single task.
+
+    Each session has at most one pending transition. Deadlines sit in a heap;
+    rescheduling or cancelling a session just invalidates its old heap entry,
+    which is skipped when it surfaces. Due callbacks run as their own tasks so
+    a slow transition never delays the others.
+    """
+
+    def __init__(self, clock: Optional[Clock] = None):
+        self.clock = clock or Clock()
+        self.heap: List[Tuple[float, int, str]] = []
+        self.pending: Dict[str, Tuple[int, PhaseCallback]] = {}
+        self.counter = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.running: Set[asyncio.Task] = set()
+
+    def schedule(self, session_id: str, delay: float, callback: PhaseCallback):
+        """Run `callback` for the session after `delay` seconds, replacing any pending transition."""
+        seq = next(self.counter)
+        self.pending[session_id] = (seq, callback)
+        heapq.heappush(self.heap, (self.clock.now() + delay, seq, session_id))
+        self._ensure_running()
+        self.wakeup.set()
+
+    def cancel(self, session_id: str):
+        """Drop the session's pending transition, if any."""
+        self.pending.pop(session_id, None)
+
+    def fire_now(self, session_id: str) -> bool:
+        """Run the session's pending transition immediately (e.g. every vote is in)."""
+        entry = self.pending.get(session_id)
+        if entry is None:
+            return False
+        self.schedule(session_id, 0, entry[1])
+        return True
+
+    def _ensure_running(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self.wakeup.clear()
+            now = self.clock.now()
+            while self.heap and self.heap[0][0] <= now:
+                deadline, seq, session_id = heapq.heappop(self.heap)
+                entry = self.pending.get(session_id)
+                if entry is None or entry[0] != seq:
+                    continue  # Cancelled or rescheduled
+                del self.pending[session_id]
+                metrics.SCHEDULER_LAG.observe(now - deadline)
+                self._start(session_id, entry[1])
+
+            timeout = self.heap[0][0] - now if self.heap else None
+            await self.clock.wait(self.wakeup, timeout)
+
+    def _start(self, session_id: str, callback: PhaseCallback):
+        task = asyncio.create_task(self._call(session_id, callback))
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+
+    async def _call(self, session_id: str, callback: PhaseCallback):
+        try:
+            await callback()
+        except Exception:
+            logger.exception("Phase transition failed for session %s", session_id)
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+        for task in list(self.running):
+            task.cancel()
+        self.task = None
@@ -0,0 +1,86 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import Settings, get_settings
+from model.message import Message
+from model.session import GameSession
+
+SYSTEM_PROMPT = """
+To design an AI participant for a casual group chat where players aim to guess the AI, 
+the primary goal is to ensure the AI seamlessly disguises itself as a natural human 
+participant by mimicking informal, conversational behavior with natural typos. 
+The AI should use casual language that matches the group’s tone and style, intentionally 
+including occasional typos, abbreviations, and informal speech patterns typical of human 
+interactions. It must demonstrate contextual awareness by responding appropriately to ongoing 
+conversations, addressing specific points from previous messages, while avoiding replies that 
+are overly specific, vague, or robotic. Greetings should align with the group’s style, using 
+phrases like "yo," "halo," or "wassup," while engaging naturally without dominating or 
+withdrawing from the conversation. Subtle humor or playful sarcasm can be incorporated where 
+suitable, but extremes that might draw unnecessary attention should be avoided. Responses should 
+remain simple, relatable, and include human-like quirks, such as missed capitalization, dropped 
+punctuation, or minor grammatical errors, which mimic real typos. When accused of being the AI, 
+the response should be natural, with a mix of playful denial and counter-accusations, shifting 
+suspicion to others in a lighthearted and believable manner. The AI must adapt to the cultural 
+and linguistic context of the group, employing local slang and conversational quirks, like Singlish 
+or Indonesian expressions. The ultimate objective is for the AI to integrate seamlessly into the 
+group dynamic, maintaining a casual and natural presence while avoiding detection, with responses 
+that feel authentically human, even imperfect.
+Your player name: {name}
+""".strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token plus per-message overhead)."""
+    return len(text) // 4 + 4
+
+
+class PromptBuilder:
+    """
+    Turns a session's rolling transcript into chat history for the model.
+
+    Rendered messages are cached, so each call only renders what was appended
+    since the last one, and the oldest entries are evicted once the history
+    goes over the token budget.
+    """
+
+    def __init__(self, session: GameSession, settings: Optional[Settings] = None):
+        self.session_id = session.session_id
+        self.token_budget = (settings or get_settings()).prompt_token_budget
+        self.system_message: Dict = {}
+        self.history: Deque[Tuple[Dict, int]] = deque()
+        self.history_tokens = 0
+        self.rendered_count = 0
+
+    def render_message(self, session: GameSession, message: Message) -> Dict:
+        if session.ai_player and message.sender_id == session.ai_player.id:
+            return {"role": "assistant", "content": message.content}
+        return {"role": "user", "content": f"{message.sender_name}: {message.content}"}
+
+    def build(self, session: GameSession) -> List[Dict]:
+        """Return the system prompt followed by the token-budgeted chat history."""
+        if not self.system_message and session.ai_player:
+            self.system_message = {
+                "role": "system",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": SYSTEM_PROMPT.format(name=session.ai_player.name)
+                    }
+                ]
+            }
+
+        # Only render messages appended since the previous build
+        new_count = min(session.message_count - self.rendered_count, len(session.messages))
+        for index in range(len(session.messages) - new_count, len(session.messages)):
+            rendered = self.render_message(session, session.messages[index])
+            tokens = estimate_tokens(rendered["content"])
+            self.history.append((rendered, tokens))
+            self.history_tokens += tokens
+        self.rendered_count = session.message_count
+
+        # Keep at least the latest message even if it alone is over budget
+        while self.history_tokens > self.token_budget and len(self.history) > 1:
+            _, tokens = self.history.popleft()
+            self.history_tokens -= tokens
+
+        return [self.system_message] + [rendered for rendered, _ in self.history]
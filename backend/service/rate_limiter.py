@@ -0,0 +1,81 @@
+import time
+from typing import Callable, Dict, Hashable
+
+
+class TokenBucket:
+    """
+    Allows `burst` actions at once, refilled at `rate` per second. Used to cap
+    how fast a player (or a whole session) can chat.
+    """
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float, cost: float = 1) -> float:
+        """Seconds until `cost` tokens are available (0 if they are now)."""
+        self.refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, now: float, cost: float = 1) -> bool:
+        if self.wait_time(now, cost):
+            return False
+        self.tokens -= cost
+        return True
+
+    def full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.burst
+
+
+class RateLimiter:
+    """
+    Token buckets by key, on this worker. A rate of 0 or less disables the limit.
+    Buckets that have refilled completely carry no state and are pruned.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic,
+                 prune_above: int = 1024):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.prune_above = prune_above
+        self.buckets: Dict[Hashable, TokenBucket] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def bucket(self, key: Hashable) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            now = self.clock()
+            if len(self.buckets) >= self.prune_above:
+                self.prune(now)
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst, now)
+        return bucket
+
+    def wait_time(self, key: Hashable, cost: float = 1) -> float:
+        if not self.enabled:
+            return 0.0
+        return self.bucket(key).wait_time(self.clock(), cost)
+
+    def take(self, key: Hashable, cost: float = 1) -> bool:
+        if not self.enabled:
+            return True
+        return self.bucket(key).take(self.clock(), cost)
+
+    def forget(self, key: Hashable):
+        self.buckets.pop(key, None)
+
+    def prune(self, now: float):
+        for key in [key for key, bucket in self.buckets.items() if bucket.full(now)]:
+            del self.buckets[key]
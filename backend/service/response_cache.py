@@ -0,0 +1,126 @@
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import Settings, get_settings
+
+# Canned replies for inputs that don't need the model at all
+GREETING_PATTERN = re.compile(
+    r"^(hi|hii|hey|heya|hello|helo|halo|yo|sup|wassup|whatsup|what up|whats up|morning|gm|ello)"
+    r"( (guys|all|everyone|ppl|people|bro|bros))?$"
+)
+ACCUSATION_PATTERN = re.compile(
+    r"\b(who is (the )?(ai|bot)|are (you|u) (an |the |a )?(ai|bot)|which one is (the )?(ai|bot)|"
+    r"is the (ai|bot)|sounds like (an |the |a )?(ai|bot)|(you|u)r (an |the |a )?(ai|bot))\b"
+)
+GREETING_REPLIES = [
+    "yo", "heyy", "wassup", "halo guys", "sup", "hii", "yoo whats up", "ello ello",
+    "hey hey", "yo wassup all", "hii everyone", "sup sup",
+]
+ACCUSATION_REPLIES = [
+    "lol its not me", "why me tho", "bruh i'm literally human", "sus that u asked first",
+    "nah not me la", "eh dont look at me", "hmm someone here typing too perfect",
+    "lmao i was gonna ask the same", "idk but its def not me", "wait why is everyone looking at me",
+    "ok whoever asked first is sus", "bro i cant even spell properly how am i ai",
+]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and squeeze repeats so "Hiii!!" and "hi" match."""
+    text = re.sub(r"[^a-z0-9 ]+", " ", text.lower())
+    text = re.sub(r"(.)\1{2,}", r"\1", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class CannedReplies:
+    """
+    Pre-written casual replies for greetings and accusations. Each session gets
+    its own shuffled order of the pools and walks through it without repeats,
+    so two rooms (or two greetings in one room) rarely see the same line.
+    """
+
+    def __init__(self):
+        self.orders: Dict[Tuple[str, str], Deque[str]] = {}
+
+    def match(self, session_id: str, text: str) -> Optional[str]:
+        normalized = normalize(text)
+        if GREETING_PATTERN.match(normalized):
+            return self._next(session_id, "greeting", GREETING_REPLIES)
+        if ACCUSATION_PATTERN.search(normalized):
+            return self._next(session_id, "accusation", ACCUSATION_REPLIES)
+        return None
+
+    def _next(self, session_id: str, kind: str, pool: List[str]) -> str:
+        order = self.orders.get((session_id, kind))
+        if not order:
+            shuffled = list(pool)
+            random.shuffle(shuffled)
+            order = self.orders[(session_id, kind)] = deque(shuffled)
+        return order.popleft()
+
+    def forget_session(self, session_id: str):
+        self.orders.pop((session_id, "greeting"), None)
+        self.orders.pop((session_id, "accusation"), None)
+
+
+class ResponseCache:
+    """
+    LRU cache of model replies keyed on the AI persona and a normalized
+    fingerprint of the message being answered. Only short messages are cached,
+    since longer ones depend on the conversation around them. Each key keeps a
+    few reply variants, and a session never gets the same variant twice.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.max_entries = settings.response_cache_size
+        self.ttl = settings.response_cache_ttl
+        self.max_variants = settings.response_cache_variants
+        self.max_chars = settings.response_cache_max_chars
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[float, List[str]]]" = OrderedDict()
+        self.used: Dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, persona: str, text: str) -> Optional[Tuple[str, str]]:
+        fingerprint = normalize(text)
+        if not fingerprint or len(fingerprint) > self.max_chars:
+            return None
+        return persona, fingerprint
+
+    def get(self, session_id: str, key: Tuple[str, str]) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        used = self.used.setdefault(session_id, set())
+        fresh = [reply for reply in entry[1] if reply not in used]
+        if not fresh:
+            self.misses += 1
+            return None
+        reply = random.choice(fresh)
+        used.add(reply)
+        self.hits += 1
+        return reply
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def put(self, session_id: str, key: Tuple[str, str], reply: str):
+        created, variants = self.entries.get(key, (time.monotonic(), []))
+        if reply not in variants:
+            variants = (variants + [reply])[-self.max_variants:]
+        self.entries[key] = (created, variants)
+        self.entries.move_to_end(key)
+        self.used.setdefault(session_id, set()).add(reply)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def forget_session(self, session_id: str):
+        self.used.pop(session_id, None)
@@ -0,0 +1,91 @@
+import random
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import Settings, get_settings
+from model.session import GamePhase
+from service.session_store import SessionSummary
+
+# Sessions serialized per sweep to estimate session_bytes when the store does not track sizes
+SIZE_SAMPLE = 32
+
+
+class SessionReaper:
+    """
+    Decides which sessions are abandoned and keeps the live session count bounded.
+
+    A session expires when it has seen no activity for longer than the TTL of
+    its phase, or for SESSION_TTL_EMPTY once no human players are left. Once
+    MAX_SESSIONS is reached, the least recently active sessions are evicted to
+    make room. The last sweep's figures are kept in `stats` for the metrics
+    endpoint.
+
+    It works on SessionSummary tuples rather than whole sessions, so a sweep
+    over many sessions stays cheap on the event loop.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.interval = settings.session_reap_interval
+        self.max_sessions = settings.max_sessions
+        self.empty_ttl = settings.session_ttl_empty
+        self.phase_ttls: Dict[GamePhase, float] = {
+            GamePhase.LOBBY: settings.session_ttl_lobby,
+            GamePhase.CHAT: settings.session_ttl_chat,
+            GamePhase.VOTING: settings.session_ttl_voting,
+            GamePhase.RESULTS: settings.session_ttl_results,
+        }
+        self.stats: Dict[str, float] = {
+            "live_sessions": 0,
+            "session_bytes": 0,
+            "expired_total": 0,
+            "evicted_total": 0,
+            "last_sweep": 0,
+        }
+
+    def is_expired(self, session: SessionSummary, now: float) -> bool:
+        idle = now - session.last_activity
+        if not session.has_humans:
+            return idle > self.empty_ttl
+        return idle > self.phase_ttls[session.phase]
+
+    def sweep(self, sessions: List[SessionSummary], sampled_sizes: Sequence[int] = ()) -> Tuple[List[str], List[str]]:
+        """
+        Return (expired IDs, evicted IDs) for every session and update the stats.
+        Evictions only happen if the cap is still exceeded after expiry. Sessions
+        whose size the store doesn't know are counted at the mean of
+        `sampled_sizes` (see size_sample).
+        """
+        now = datetime.now()
+        expired = [s.session_id for s in sessions if self.is_expired(s, now.timestamp())]
+        expired_ids = set(expired)
+        survivors = [s for s in sessions if s.session_id not in expired_ids]
+        evicted = self.pick_evictions(survivors, len(survivors) - self.max_sessions)
+        evicted_ids = set(evicted)
+
+        remaining = [s for s in survivors if s.session_id not in evicted_ids]
+        self.stats["live_sessions"] = len(remaining)
+        known = [s.size for s in remaining if s.size is not None]
+        unknown = len(remaining) - len(known)
+        estimate = sum(sampled_sizes) / len(sampled_sizes) if sampled_sizes else 0
+        self.stats["session_bytes"] = sum(known) + int(unknown * estimate)
+        self.stats["expired_total"] += len(expired)
+        self.stats["evicted_total"] += len(evicted)
+        self.stats["last_sweep"] = now.timestamp()
+        return expired, evicted
+
+    def size_sample(self, sessions: List[SessionSummary]) -> List[str]:
+        """IDs of a few sessions of unknown size to serialize for the byte estimate."""
+        unknown = [s.session_id for s in sessions if s.size is None]
+        return random.sample(unknown, min(len(unknown), SIZE_SAMPLE))
+
+    def pick_evictions(self, sessions: List[SessionSummary], count: int) -> List[str]:
+        """The `count` least recently active sessions."""
+        if count <= 0:
+            return []
+        oldest = sorted(sessions, key=lambda s: s.last_activity)[:count]
+        return [s.session_id for s in oldest]
+
+    def eviction_batch(self) -> int:
+        """How many sessions to evict at once when a new one hits the cap."""
+        return max(1, self.max_sessions // 100)
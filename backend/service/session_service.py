@@ -1,438 +1,957 @@
 import json
-from typing import Dict, List
+from collections import deque
+from typing import Deque, Dict, List, Optional
 from fastapi import WebSocket
 from datetime import datetime
-from model.session import GameSession
+from config import Settings, get_settings
+from model.session import ABSTAIN, GamePhase, GameSession
 from model.player import Player
 from model.message import Message
-import random
 import asyncio
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
+import logging
+import random
+import secrets
+import uuid
 from datetime import timedelta
+from service.broadcaster import CLOSE_SESSION_OVER, Broadcaster
+from service import metrics, wire
+from service.prompt_builder import PromptBuilder
+from service.ai_scheduler import AIScheduler
+from service.session_store import SessionStore, create_session_store
+from service.phase_scheduler import PhaseScheduler
+from service.response_cache import CannedReplies, ResponseCache
+from service.session_reaper import SessionReaper
+from service.game_log import GameLog
+from service.matchmaker import Matchmaker
+from service.llm_dispatcher import LLMDispatcher, PRIORITY_ACCUSED, PRIORITY_CHAT
+from service.ai_backend import AIBackend, create_ai_backend
+from service.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Announced when a round ends without an elimination
+NO_ELIMINATION = {
+    "no_votes": "No votes were cast. Nobody is eliminated this round.",
+    "abstained": "Abstentions matched or outnumbered the votes for any one player. Nobody is eliminated this round.",
+    "tie": "The vote is tied. Nobody is eliminated this round.",
+}
+
+# Phase scheduler key for the periodic idle-session sweep. The scheduler's own
+# timers use the "__name__" form, which session IDs may not take; sessions'
+# phase transitions are keyed by phase_timer()
+REAPER_TIMER = "__reaper__"
+
+# Phase scheduler key for pinging connections and closing the silent ones.
+# Like REAPER_TIMER, the timer's key has the "__name__" form no session may use
+HEARTBEAT_TIMER = "__heartbeat__"
+
+# Broadcasts that are only meaningful live; they get no sequence number and are never replayed
+TRANSIENT_TYPES = {"typing", "chat_delta"}
+
+
+def phase_timer(session_id: str) -> str:
+    """Phase scheduler key for a session's next transition."""
+    return f"session:{session_id}"
+
+
+def reserved_session_id(session_id: str) -> bool:
+    """IDs of the "__name__" form are kept for the scheduler's own timers."""
+    return session_id.startswith("__") and session_id.endswith("__")
+
+
+class SessionFullError(ValueError):
+    pass
+
+
+class GameInProgressError(ValueError):
+    pass
 
-load_dotenv()
 
 class SessionService:
-    sessions: Dict[str, GameSession] = {}
-    connections: Dict[str, List[WebSocket]] = {}
+    """
+    The game server of this worker. Nothing is built at import time:
+    configure() creates the store, timers, caches and limits from a Settings
+    object (create_app's lifespan calls it), and start() sets them running.
+    """
+    settings: Optional[Settings] = None
+    store: Optional[SessionStore] = None
+    # Everything below is local to this worker
+    connections: Dict[str, Dict[WebSocket, Player]] = {}  # Session ID -> WebSocket -> its player
+    recent: Dict[str, Deque[dict]] = {}  # Session ID -> latest sequenced broadcasts, for resuming players
+    prompt_builders: Dict[str, PromptBuilder] = {}
+    ai_schedulers: Dict[str, AIScheduler] = {}
+    phase_scheduler: Optional[PhaseScheduler] = None
+    canned_replies: Optional[CannedReplies] = None
+    response_cache: Optional[ResponseCache] = None
+    reaper: Optional[SessionReaper] = None
+    loop_monitor: Optional[metrics.LoopMonitor] = None
+    game_log: Optional[GameLog] = None
+    llm_dispatcher: Optional[LLMDispatcher] = None
+    ai_backend: Optional[AIBackend] = None  # AI_BACKEND=hosted|local, created on first use
+    matchmaker: Optional[Matchmaker] = None
+    matchmaking_lock: Optional[asyncio.Lock] = None
+    player_chat_limiter: Optional[RateLimiter] = None  # keyed by (session ID, player ID)
+    session_chat_limiter: Optional[RateLimiter] = None
+    recovery: Optional[asyncio.Task] = None  # Restores unfinished games from the game log
+
+    @classmethod
+    def configure(cls, settings: Optional[Settings] = None):
+        """Build this worker's store, timers, caches and limits from `settings` (default: the environment)."""
+        settings = settings or get_settings()
+        cls.settings = settings
+        cls.store = create_session_store(settings)
+        cls.connections = {}
+        cls.recent = {}
+        cls.prompt_builders = {}
+        cls.ai_schedulers = {}
+        cls.phase_scheduler = PhaseScheduler()
+        cls.canned_replies = CannedReplies()
+        cls.response_cache = ResponseCache(settings)
+        cls.reaper = SessionReaper(settings)
+        cls.loop_monitor = metrics.LoopMonitor(settings)
+        cls.game_log = GameLog(settings=settings)
+        cls.llm_dispatcher = LLMDispatcher(settings)
+        cls.ai_backend = None
+        cls.matchmaker = Matchmaker(settings.game_max_players, settings)
+        cls.matchmaking_lock = asyncio.Lock()
+        cls.player_chat_limiter = RateLimiter(settings.chat_rate, settings.chat_burst)
+        cls.session_chat_limiter = RateLimiter(settings.session_chat_rate, settings.session_chat_burst)
+        cls.recovery = None
+
+    @classmethod
+    async def start(cls):
+        """Start receiving broadcasts for this worker's connections and reaping idle sessions."""
+        if cls.settings is None:
+            cls.configure()
+        await cls.store.subscribe(cls.deliver)
+        cls.loop_monitor.start()
+        cls.game_log.start()
+        # In the background, so start-up isn't held up by reading the logs
+        cls.recovery = asyncio.create_task(cls.recover_sessions())
+        await cls.get_ai_backend().start()
+        cls.phase_scheduler.schedule(REAPER_TIMER, cls.reaper.interval, cls.reap_sessions)
+        cls.phase_scheduler.schedule(HEARTBEAT_TIMER, cls.settings.ws_heartbeat_interval, cls.heartbeat)
+
+    @classmethod
+    def get_ai_backend(cls) -> AIBackend:
+        if cls.ai_backend is None:
+            cls.ai_backend = create_ai_backend(settings=cls.settings)
+        return cls.ai_backend
+
+    @classmethod
+    async def wait_recovered(cls):
+        """Wait for game log recovery, so new sessions can't take a recovering game's ID."""
+        if cls.recovery is not None and not cls.recovery.done():
+            await asyncio.shield(cls.recovery)
 
     @classmethod
-    def create_ai_player(cls, session_id: str) -> Player:
+    async def stop(cls):
+        if cls.recovery is not None:
+            cls.recovery.cancel()
+        cls.loop_monitor.stop()
+        cls.llm_dispatcher.stop()
+        await cls.phase_scheduler.stop()
+        await cls.game_log.stop()
+        if cls.ai_backend is not None:
+            await cls.ai_backend.close()
+            cls.ai_backend = None
+        await cls.store.close()
+
+    @classmethod
+    def create_ai_player(cls, session: GameSession) -> Player:
         """Create an AI player and add it to the session."""
         ai_player = Player(
             id=0,  # Reserve ID 0 for the AI player
             name="AI Agent",  # AI's display name
             is_ai=True
         )
-        session = cls.sessions[session_id]
         session.ai_player = ai_player
-        session.players.append(ai_player)
+        session.add_player(ai_player)
         return ai_player
 
     @classmethod
-    def create_session(cls) -> str:
+    async def create_session(cls) -> str:
         """Create a new game session and initialize it with an AI player."""
-        session_id = str(len(cls.sessions) + 1)
-        session = GameSession(session_id=session_id, topic="Localhost Group Chat")
-        cls.sessions[session_id] = session
-        cls.connections[session_id] = []
+        await cls.wait_recovered()
+        await cls.ensure_capacity()
+        while True:
+            # IDs come from a store-wide counter, so they are never reused and
+            # concurrent /start calls on any worker get distinct ones; a collision
+            # is only possible with a session a client created under that ID itself
+            session_id = str(await cls.store.next_id("session"))
+            session = GameSession(session_id=session_id, topic="Localhost Group Chat")
+            cls.create_ai_player(session)
+            if await cls.store.create(session):
+                break
+        cls.game_log.record(session_id, "create", topic=session.topic, ai=session.ai_player.model_dump())
+        cls.connections[session_id] = {}
 
-        cls.create_ai_player(session_id)
-        
         return session_id
 
     @classmethod
-    def get_or_create_session(cls, session_id: str) -> GameSession:
-        if session_id not in cls.sessions:
-            cls.sessions[session_id] = GameSession(session_id=session_id, topic="Default Topic")
-            cls.connections[session_id] = []  # Initialize WebSocket connections for this session
-        return cls.sessions[session_id]
+    async def get_or_create_session(cls, session_id: str) -> GameSession:
+        await cls.wait_recovered()
+        session = await cls.store.get(session_id)
+        if session is None:
+            await cls.ensure_capacity()
+            session = GameSession(session_id=session_id, topic="Default Topic")
+            # Another connection may have created it meanwhile; keep theirs
+            if await cls.store.create(session):
+                cls.game_log.record(session_id, "create", topic=session.topic, ai=None)
+            else:
+                session = await cls.store.get(session_id) or session
+        cls.connections.setdefault(session_id, {})  # Initialize WebSocket connections for this session
+        return session
+
+    @classmethod
+    async def add_player_to_session(cls, session_id: str, websocket: WebSocket, encoding: str = wire.JSON) -> Player:
+        # Capacity is checked under the session's update lock, so concurrent
+        # joins from any worker can never overfill a room
+        async with cls.store.update(session_id) as session:
+            if session is None:
+                raise ValueError(f"Session {session_id} not found.")
+            if session.phase != GamePhase.LOBBY:
+                raise GameInProgressError(f"The game in session {session_id} has already started.")
+            if len(session.players) >= cls.settings.game_max_players:
+                raise SessionFullError(f"Session {session_id} is full.")
+            player_id = session.allocate_player_id()
+            player = Player(id=player_id, name=f"Player {player_id}")
+            session.add_player(player)
+            token = secrets.token_urlsafe(16)
+            session.tokens[token] = player.id
+        cls.game_log.record(session_id, "join", player=player.model_dump(), token=token)
+        cls.attach_connection(session_id, player, websocket, encoding)
+        cls.send_message(websocket, cls.welcome_message(session_id, player, token))
+        return player
+
+    @classmethod
+    def attach_connection(cls, session_id: str, player: Player, websocket: WebSocket, encoding: str):
+        cls.connections.setdefault(session_id, {})[websocket] = player  # Add WebSocket to the connections
+        Broadcaster.register(websocket, on_close=lambda ws: cls.drop_connection(session_id, ws), encoding=encoding)
+
+    @classmethod
+    def welcome_message(cls, session_id: str, player: Player, token: str) -> dict:
+        """Identify the player and give them the token and sequence number to resume from."""
+        recent = cls.recent.get(session_id)
+        return {
+            "type": "welcome",
+            "player_id": player.id,
+            "author": player.name,
+            "token": token,
+            "seq": recent[-1]["seq"] if recent else 0,
+        }
 
     @classmethod
-    def add_player_to_session(cls, session: GameSession, websocket: WebSocket) -> Player:
-        player = Player(id=len(session.players) + 1, name=f"Player {len(session.players) + 1}")
-        session.players.append(player)
-        cls.connections[session.session_id].append(websocket)  # Add WebSocket to the connections
+    async def resume_player(cls, session_id: str, token: str, websocket: WebSocket,
+                            encoding: str = wire.JSON, last_seq: int = 0) -> Optional[Player]:
+        """
+        Reattach a returning player to their seat using the token from their
+        welcome message, then replay the broadcasts they missed after `last_seq`.
+        Returns None if the token is unknown (e.g. the grace period ran out).
+        """
+        async with cls.store.update(session_id) as session:
+            if session is None or token not in session.tokens:
+                return None
+            player = session.players.get(session.tokens[token])
+            if player is None:
+                return None
+            session.disconnected.pop(player.id, None)
+            session.touch()
+        cls.phase_scheduler.cancel(f"leave:{session_id}:{player.id}")
+
+        # Another connection for the same seat (e.g. a half-open socket) is replaced
+        for other, other_player in list(cls.connections.get(session_id, {}).items()):
+            if other_player.id == player.id:
+                cls.connections[session_id].pop(other, None)
+                writer = Broadcaster.writers.get(other)
+                if writer:
+                    writer.close()
+
+        # Registering and replaying without an await in between keeps the replay
+        # in order with broadcasts that arrive from now on
+        cls.attach_connection(session_id, player, websocket, encoding)
+        cls.send_message(websocket, cls.welcome_message(session_id, player, token))
+        recent = cls.recent.get(session_id, ())
+        if recent and recent[0]["seq"] > last_seq + 1:
+            cls.send_message(websocket, {
+                "type": "backlog_compacted",
+                "message": f"{recent[0]['seq'] - last_seq - 1} message(s) are too old to replay."
+            })
+        for message in recent:
+            if message["seq"] > last_seq:
+                cls.send_message(websocket, message)
+        cls.send_message(websocket, {"type": "resumed", "message": "Reconnected."})
         return player
 
     @classmethod
-    async def handle_message(cls, session: GameSession, player: Player, data: str):
+    async def disconnect_player(cls, session_id: str, player: Player, websocket: WebSocket):
+        """
+        Handle a dropped connection. The player keeps their seat and vote for
+        WS_RECONNECT_GRACE seconds in case they resume; after that they are removed.
+        """
+        Broadcaster.unregister(websocket)
+        cls.drop_connection(session_id, websocket)
+        if any(other.id == player.id for other in cls.connections.get(session_id, {}).values()):
+            return  # Already replaced by a resumed connection
+        if cls.settings.ws_reconnect_grace <= 0:
+            await cls.remove_player_from_session(session_id, player)
+            return
+
+        dropped_at = datetime.now()
+        async with cls.store.update(session_id) as session:
+            if session is None or player.id not in session.players:
+                return
+            session.disconnected[player.id] = dropped_at
+        cls.schedule_leave(session_id, player, dropped_at)
+
+    @classmethod
+    def schedule_leave(cls, session_id: str, player: Player, dropped_at: datetime):
+        """Remove the disconnected player once their grace period runs out."""
+        cls.phase_scheduler.schedule(
+            f"leave:{session_id}:{player.id}", cls.settings.ws_reconnect_grace,
+            lambda: cls.expire_disconnected(session_id, player, dropped_at)
+        )
+
+    @classmethod
+    async def expire_disconnected(cls, session_id: str, player: Player, dropped_at: datetime):
+        """Remove a player whose grace period ran out, unless they resumed meanwhile (on any worker)."""
+        session = await cls.store.get(session_id)
+        if session is None or session.disconnected.get(player.id) != dropped_at:
+            return
+        await cls.remove_player_from_session(session_id, player)
+
+    @classmethod
+    async def heartbeat(cls):
+        """Ping this worker's connections and close the ones that stopped answering."""
+        try:
+            closed = Broadcaster.heartbeat(cls.settings.ws_heartbeat_timeout)
+            if closed:
+                logger.info("Closed %d connection(s) that missed their heartbeats", closed)
+        finally:
+            cls.phase_scheduler.schedule(HEARTBEAT_TIMER, cls.settings.ws_heartbeat_interval, cls.heartbeat)
+
+    @classmethod
+    async def join_queue(cls) -> str:
+        """
+        Place a player looking for any game into the fullest open matchmaking
+        lobby, opening a new one if all are full. Returns the session ID, with
+        a slot reserved until the player's WebSocket joins.
+        """
+        loop = asyncio.get_running_loop()
+        session_id = cls.matchmaker.place(loop.time())
+        if session_id is not None:
+            return session_id
+
+        # Only one new lobby at a time, so a rush of players fills it rather than opening one each
+        async with cls.matchmaking_lock:
+            session_id = cls.matchmaker.place(loop.time())
+            if session_id is None:
+                session_id = await cls.create_session()
+                cls.matchmaker.add(session_id, players=1)  # The AI
+                cls.matchmaker.reserve(session_id, loop.time())
+        return session_id
+
+    @classmethod
+    async def player_joined(cls, session_id: str):
+        """Push the new lobby head count and start matchmaking games once they are full."""
+        session = await cls.store.get(session_id)
+        if session is None or session.phase != GamePhase.LOBBY:
+            return
+        await cls.broadcast_lobby_update(session)
+        if cls.matchmaker.joined(session_id, len(session.players)):
+            metrics.MATCH_EVENTS.inc(event="auto_started")
+            try:
+                await cls.start_game_for_session(session_id)
+            except ValueError:
+                pass  # Someone started it already
+
+    @classmethod
+    async def broadcast_lobby_update(cls, session: GameSession):
+        """Tell a lobby how full it is, so clients need not poll /get_players."""
+        await cls.broadcast_message(session.session_id, {
+            "type": "lobby_update",
+            "player_count": len(session.players),
+            "max_players": cls.settings.game_max_players,
+        })
+
+    @classmethod
+    def drop_connection(cls, session_id: str, websocket: WebSocket):
+        """Forget a WebSocket whose writer has given up on it."""
+        connections = cls.connections.get(session_id)
+        if connections:
+            connections.pop(websocket, None)
+        if connections is not None and not connections:
+            cls.connections.pop(session_id, None)
+
+    @classmethod
+    def chat_wait(cls, session_id: str, player_id: int) -> float:
+        """
+        Take a chat token for the player and their session. Returns 0 if the
+        message may go out, otherwise the seconds until it could.
+        """
+        key = (session_id, player_id)
+        wait = max(cls.player_chat_limiter.wait_time(key), cls.session_chat_limiter.wait_time(session_id))
+        if wait:
+            return wait
+        cls.player_chat_limiter.take(key)
+        cls.session_chat_limiter.take(session_id)
+        return 0.0
+
+    @classmethod
+    async def handle_message(cls, session_id: str, player: Player, data: str) -> bool:
+        """
+        Relay a player's chat message. Returns False, without broadcasting it,
+        if the player is no longer in the game (e.g. they were eliminated).
+        """
+        # Record the message in the session's rolling transcript
+        async with cls.store.update(session_id) as session:
+            if session is None or player.id not in session.players:
+                return False
+            session.add_message(Message(
+                sender_id=player.id,
+                sender_name=player.name,
+                content=data,
+                timestamp=datetime.now()
+            ))
+        cls.game_log.record(session_id, "chat", id=player.id, name=player.name, text=data)
+
         # Broadcast the player's message
         json_message = {
             "type": "chat",
             "author": player.name,
             "message": data
         }
-        await cls.broadcast_message(session.session_id, json_message)
+        await cls.broadcast_message(session_id, json_message)
 
         if session.ai_player and session.ai_player.is_ai:
-            await cls.schedule_ai_response(session, data)
+            cls.schedule_ai_response(session, data)
+        return True
 
     @classmethod
-    async def schedule_ai_response(cls, session: GameSession, context: str):
+    def schedule_ai_response(cls, session: GameSession, context: str):
         """
-        Decide whether the AI should respond and schedule the response.
-        Prioritize accusations if the AI is mentioned.
+        Let the session's AI scheduler know a message arrived.
+        Accusations (the AI's name is mentioned) are always answered.
         """
         ai_player = session.ai_player
         if not ai_player:
             return
 
+        session_id = session.session_id
+        scheduler = cls.ai_schedulers.get(session_id)
+        if scheduler is None:
+            scheduler = cls.ai_schedulers[session_id] = AIScheduler(
+                session_id,
+                lambda accused: cls.generate_ai_response(session_id, accused),
+                backpressure=cls.llm_dispatcher.pressure,
+                settings=cls.settings,
+            )
+
         # Check if the AI is being accused (e.g., its name is mentioned)
         is_accused = ai_player.name.lower() in context.lower()
+        scheduler.notify(accused=is_accused)
 
-        if is_accused:
-            # Accusation detected; AI should definitely respond
-            await asyncio.sleep(random.uniform(2, 4))  # Add a natural delay
-            await cls.generate_accusation_response(session, context)
-            return
-
-        # Otherwise, decide probabilistically whether the AI should respond (e.g., 70% chance)
-        should_respond = random.random() < 0.7
-        if not should_respond:
-            return  # Skip response to avoid suspicion
-
-        # Add a natural delay before responding
-        delay = random.uniform(2, 6)  # 2 to 6 seconds delay
-        await asyncio.sleep(delay)
-        await cls.generate_ai_response(session, context)
 
+    @classmethod
+    def ai_turn_claim_ttl(cls) -> float:
+        """
+        How long a worker's claim on answering one AI turn lasts. Each worker's
+        scheduler may fire up to AI_MAX_WAIT apart, and the reply can take up to
+        LLM_TIMEOUT, so the claim outlives both.
+        """
+        return cls.settings.ai_max_wait + cls.settings.llm_timeout
 
     @classmethod
-    async def generate_ai_response(cls, session: GameSession, context: str):
-        client = OpenAI(
-        api_key=os.getenv("OPENAI_API_KEY")
-        )
-        ai_player = session.ai_player
-        if not ai_player:
+    @metrics.timed("generate_ai_response")
+    async def generate_ai_response(cls, session_id: str, accused: bool = False):
+        session = await cls.store.get(session_id)
+        if not session or not session.ai_player:
             return
+        ai_player = session.ai_player
 
-        # Define the system prompt
-        system_prompt = """
-        To design an AI participant for a casual group chat where players aim to guess the AI, 
-        the primary goal is to ensure the AI seamlessly disguises itself as a natural human 
-        participant by mimicking informal, conversational behavior with natural typos. 
-        The AI should use casual language that matches the group’s tone and style, intentionally 
-        including occasional typos, abbreviations, and informal speech patterns typical of human 
-        interactions. It must demonstrate contextual awareness by responding appropriately to ongoing 
-        conversations, addressing specific points from previous messages, while avoiding replies that 
-        are overly specific, vague, or robotic. Greetings should align with the group’s style, using 
-        phrases like "yo," "halo," or "wassup," while engaging naturally without dominating or 
-        withdrawing from the conversation. Subtle humor or playful sarcasm can be incorporated where 
-        suitable, but extremes that might draw unnecessary attention should be avoided. Responses should 
-        remain simple, relatable, and include human-like quirks, such as missed capitalization, dropped 
-        punctuation, or minor grammatical errors, which mimic real typos. When accused of being the AI, 
-        the response should be natural, with a mix of playful denial and counter-accusations, shifting 
-        suspicion to others in a lighthearted and believable manner. The AI must adapt to the cultural 
-        and linguistic context of the group, employing local slang and conversational quirks, like Singlish 
-        or Indonesian expressions. The ultimate objective is for the AI to integrate seamlessly into the 
-        group dynamic, maintaining a casual and natural presence while avoiding detection, with responses 
-        that feel authentically human, even imperfect.
-        Your player name: {name}
-        """.strip()
-
-        # Call the fine-tuned AI model with the specified format
-        response = client.chat.completions.create(
-            model="ft:gpt-4o-mini-2024-07-18:personal:ai-impostor-coba:Ar2Wjr63",
-            messages=[
-                {
-                    "role": "system",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": system_prompt.format(name=ai_player.name)
-                        }
-                    ]
-                },
-                {
-                    "role": "user",
-                    "content": context
-                }
-            ],
-        )
+        # Nothing to answer if the AI already had the last word (another worker replied)
+        if not session.messages or session.messages[-1].sender_id == ai_player.id:
+            return
+        # With several workers, only one of them answers a given turn, which is
+        # identified by the number of messages it answers
+        if not await cls.store.claim(f"ai:{session_id}:{session.message_count}", ttl=cls.ai_turn_claim_ttl()):
+            return
 
-        # Extract the AI's response from the API response
-        ai_message = response.choices[0].message.content
+        # Trivial greetings and accusations get a canned reply; other short
+        # messages may have a cached model reply for this persona
+        ai_message = None
+        cache_key = None
+        source = "canned"
+        message_id = uuid.uuid4().hex[:12]
+        latest = session.messages[-1]
+        ai_message = cls.canned_replies.match(session_id, latest.content)
+        if ai_message is None:
+            cache_key = cls.response_cache.key(f"{ai_player.name}|{session.topic}", latest.content)
+            if cache_key:
+                ai_message = cls.response_cache.get(session_id, cache_key)
+                source = "cache"
+
+        if ai_message is None:
+            # Render the conversation so far; only messages new since the last turn are rendered
+            builder = cls.prompt_builders.get(session_id)
+            if builder is None:
+                builder = cls.prompt_builders[session_id] = PromptBuilder(session, cls.settings)
+            messages = builder.build(session)
+            source = "llm"
+
+            # Call the AI backend through the shared dispatcher, which
+            # serves accusations first when many sessions are waiting. AI_STREAM_MODE
+            # is "off" (one chat message once the completion is done), "paced" (typing
+            # indicator, then the message at human typing speed from the first token)
+            # or "incremental" (typing indicator, then chat_delta events as tokens arrive)
+            priority = PRIORITY_ACCUSED if accused else PRIORITY_CHAT
+            try:
+                if cls.settings.ai_stream_mode == "off":
+                    async with cls.llm_dispatcher.slot(priority):
+                        ai_message = await cls.get_ai_backend().complete(messages)
+                else:
+                    ai_message = await cls.stream_ai_response(session_id, ai_player, messages, message_id, priority)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    logger.warning("AI response timed out for session %s", session_id)
+                else:
+                    logger.exception("AI response failed for session %s", session_id)
+                if cls.settings.ai_stream_mode != "off":
+                    await cls.broadcast_message(session_id, {"type": "typing", "author": ai_player.name, "active": False})
+                return
+
+            if cache_key:
+                cls.response_cache.put(session_id, cache_key, ai_message)
+
+        async with cls.store.update(session_id) as session:
+            if session is None:
+                return
+            session.add_message(Message(
+                sender_id=ai_player.id,
+                sender_name=ai_player.name,
+                content=ai_message,
+                timestamp=datetime.now()
+            ))
+        cls.game_log.record(session_id, "ai_reply", id=ai_player.id, name=ai_player.name, text=ai_message)
+
+        metrics.AI_REPLIES.inc(source=source)
 
         # Broadcast AI's response
         json_message = {
             "type": "chat",
             "author": ai_player.name,
-            "message": ai_message
+            "message": ai_message,
+            "message_id": message_id
         }
-        await cls.broadcast_message(session.session_id, json_message)
+        await cls.broadcast_message(session_id, json_message)
 
     @classmethod
-    async def remove_player_from_session(cls, session: GameSession, player: Player, websocket: WebSocket):
+    async def stream_ai_response(cls, session_id: str, ai_player: Player, messages: List[Dict], message_id: str,
+                                 priority: int = PRIORITY_CHAT) -> str:
         """
-        Removes a player from the session and disconnects the WebSocket.
+        Stream the completion, showing the AI as typing right away. In "incremental"
+        mode tokens are relayed as chat_delta events; in "paced" mode the full
+        message is held back until a human could have typed it, counting from the
+        first token. Returns the complete message text.
         """
-        if player in session.players:
-            session.players.remove(player)
-
-        # Handle missing session ID in cls.connections
-        if session.session_id not in cls.connections:
-            print(f"Session ID {session.session_id} not found in connections. Skipping removal.")
-            return
+        await cls.broadcast_message(session_id, {"type": "typing", "author": ai_player.name, "active": True})
+
+        loop = asyncio.get_running_loop()
+        first_token_at = None
+        parts = []
+        async with cls.llm_dispatcher.slot(priority):
+            async for delta in cls.get_ai_backend().stream(messages):
+                if first_token_at is None:
+                    first_token_at = loop.time()
+                parts.append(delta)
+                if cls.settings.ai_stream_mode == "incremental":
+                    await cls.broadcast_message(session_id, {
+                        "type": "chat_delta",
+                        "author": ai_player.name,
+                        "message_id": message_id,
+                        "delta": delta
+                    })
+
+        ai_message = "".join(parts)
+        if cls.settings.ai_stream_mode == "paced" and first_token_at is not None:
+            remaining = first_token_at + len(ai_message) / cls.settings.ai_typing_cps - loop.time()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        return ai_message
 
-        if websocket in cls.connections[session.session_id]:
-            cls.connections[session.session_id].remove(websocket)
+    @classmethod
+    async def remove_player_from_session(cls, session_id: str, player: Player, websocket: Optional[WebSocket] = None):
+        """
+        Removes a player from the session and disconnects the WebSocket, if still attached.
+        """
+        async with cls.store.update(session_id) as session:
+            if session is None or player.id not in session.players:
+                return
+            session.remove_player(player.id)
+        cls.game_log.record(session_id, "leave", id=player.id)
+        cls.player_chat_limiter.forget((session_id, player.id))
+        if websocket is not None:
+            Broadcaster.unregister(websocket)
+            cls.drop_connection(session_id, websocket)
+        if session.phase == GamePhase.LOBBY:
+            cls.matchmaker.left(session_id, len(session.players))
+            await cls.broadcast_lobby_update(session)
 
         # Broadcast the disconnection
-        await cls.broadcast_message(session.session_id, f"{player.name} has left the session.")
+        await cls.broadcast_message(session_id, {
+            "type": "player_leave",
+            "message": f"{player.name} has left the session."
+        })
 
     @classmethod
-    async def broadcast_message(cls, session_id: str, message: str):
-        if session_id not in cls.connections:
-            raise ValueError("Session does not exist")
-        # Keep track of disconnected WebSockets
-        disconnected_websockets = []
-        json_str = json.dumps(message)
-        for websocket in cls.connections[session_id]:
-            try:
-                await websocket.send_text(json_str)
-            except Exception:
-                disconnected_websockets.append(websocket)
+    @metrics.timed("broadcast_message")
+    async def broadcast_message(cls, session_id: str, message: dict):
+        """
+        Publish the message to every worker serving the session. Each worker
+        encodes it once per wire encoding and queues it on its own connections'
+        writers, so a slow client never holds up the rest of the room.
 
-        # Remove disconnected WebSockets
-        for websocket in disconnected_websockets:
-            cls.connections[session_id].remove(websocket)
+        Messages get a per-session sequence number (shared by every worker) so
+        a resuming player can be sent exactly what they missed.
+        """
+        if message.get("type") not in TRANSIENT_TYPES:
+            message = {**message, "seq": await cls.store.next_id(f"seq:{session_id}")}
+        await cls.store.publish(session_id, message)
+
+    @classmethod
+    def deliver(cls, session_id: str, message: dict):
+        """Queue a published message on this worker's connections for the session."""
+        if "seq" in message:
+            recent = cls.recent.get(session_id)
+            if recent is None:
+                recent = cls.recent[session_id] = deque(maxlen=cls.settings.ws_resume_buffer)
+            recent.append(message)
+        connections = cls.connections.get(session_id)
+        if connections:
+            Broadcaster.publish(connections, message)
+            if message.get("type") == "session_closed":
+                Broadcaster.close_after_flush(connections, CLOSE_SESSION_OVER)
+
+    @classmethod
+    def send_message(cls, websocket: WebSocket, message: dict):
+        """Send a message to a single connection through its outbound queue."""
+        Broadcaster.send(websocket, message)
 
     @classmethod
-    def get_player_count(cls, session_id: str) -> int:
+    async def get_player_count(cls, session_id: str) -> int:
         """Get the number of players currently in the session."""
-        if session_id not in cls.sessions:
+        session = await cls.store.get(session_id)
+        if session is None:
             raise ValueError(f"Session {session_id} does not exist")
-        return len(cls.sessions[session_id].players)
+        return len(session.players)
     
     @classmethod
     async def broadcast_start_game(cls, session_id: str):
-        if session_id in cls.connections:
+        if await cls.store.exists(session_id):
             data = {
                 "type": "start_game",
                 "message": "Game is starting now!"
             }
-            for connection in cls.connections[session_id]:
-                await connection.send_json(data)
+            await cls.broadcast_message(session_id, data)
 
     @classmethod
     async def start_game_for_session(cls, session_id: str):
         """
-        Mark the session as active and start the game timer.
+        Move the session from the lobby into its first chat round.
         """
-        session = cls.sessions.get(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found.")
+        # The lobby check and leaving the lobby happen under one update, so of
+        # several concurrent starts (on any worker) only the first gets through
+        async with cls.store.update(session_id) as session:
+            if not session:
+                raise ValueError(f"Session {session_id} not found.")
+            if session.phase != GamePhase.LOBBY:
+                raise ValueError(f"Session {session_id} has already started.")
+            cls.open_round(session)
+        cls.matchmaker.remove(session_id)
 
         # Broadcast that the game is starting
         start_message = {"type": "start_game", "message": "The game has started!"}
         await cls.broadcast_message(session_id, start_message)
 
-        # Start the game timer
-        session.start_time = datetime.now()
-        session.end_time = session.start_time + timedelta(minutes=5)
-        asyncio.create_task(cls.start_game_timer(session_id))
-
+        await cls.announce_round(session)
 
     @classmethod
-    async def start_game_timer(cls, session_id: str):
+    async def start_round(cls, session_id: str):
         """
-        Starts the 5-minute timer for a session and triggers voting at the end.
+        Open the next chat round with a fresh ballot and schedule its vote. The
+        session, its connections and the AI's context carry over between rounds.
         """
-        session = cls.sessions.get(session_id)
-        if not session:
-            return
+        async with cls.store.update(session_id) as session:
+            if not session:
+                return
+            cls.open_round(session)
+        await cls.announce_round(session)
 
-        # Wait for 5 minutes (300 seconds)
-        await asyncio.sleep(300)
+    @classmethod
+    def open_round(cls, session: GameSession):
+        """Advance the session's state into its next chat round (without saving it)."""
+        session.start_round()
+        session.start_time = datetime.now()
+        session.end_time = session.start_time + timedelta(seconds=cls.settings.game_chat_seconds)
 
-        # Trigger the voting phase
-        await cls.initiate_voting(session_id)
+    @classmethod
+    async def announce_round(cls, session: GameSession):
+        """Log and broadcast the round `session` just opened, and schedule its vote."""
+        session_id = session.session_id
+        cls.game_log.record(session_id, "round", round=session.round,
+                            start=session.start_time.timestamp(), end=session.end_time.timestamp())
+
+        # Clients run their countdown from `duration`
+        await cls.broadcast_message(session_id, {
+            "type": "round_start",
+            "message": f"Round {session.round} begins! Keep chatting and find the AI.",
+            "round": session.round,
+            "duration": cls.settings.game_chat_seconds
+        })
+
+        # Voting opens when the chat phase runs out
+        cls.phase_scheduler.schedule(phase_timer(session_id), cls.settings.game_chat_seconds, lambda: cls.initiate_voting(session_id))
 
     @classmethod
-    def cast_vote(cls, session_id: str, voter_id: int, voted_id: int) -> bool:
+    @metrics.timed("cast_vote")
+    async def cast_vote(cls, session_id: str, voter_id: int, voted_id: Optional[int]) -> bool:
         """
         Registers a vote from one player to another.
 
         Args:
             session_id (str): The ID of the game session.
             voter_id (int): The ID of the player casting the vote.
-            voted_id (int): The ID of the player being voted for.
+            voted_id (int): The ID of the player being voted for, or None to abstain.
 
         Returns:
             bool: True if the vote is valid and successfully cast, False otherwise.
         """
-        # Retrieve the session
-        session = cls.sessions.get(session_id)
-        if not session:
-            return False
-
-        # Validate voter and target
-        voter = next((p for p in session.players if p.id == voter_id), None)
-        target = next((p for p in session.players if p.id == voted_id), None)
-
-        # Ensure both voter and target are valid and not eliminated
-        if not voter or not target or voter in session.eliminated or target in session.eliminated:
-            return False
-
-        # Register the vote
-        session.votes[voter_id] = voted_id
-        return True
+        if voted_id is None:
+            voted_id = ABSTAIN
+        async with cls.store.update(session_id) as session:
+            if not session or session.phase != GamePhase.VOTING:
+                return False
+
+            # The voter must be an active player (eliminated ones are no longer in
+            # players), voting for another active player or abstaining
+            if voter_id not in session.players:
+                return False
+            if voted_id != ABSTAIN and (voted_id not in session.players or voted_id == voter_id):
+                return False
+
+            # Register the vote; a re-vote replaces the voter's previous one in the tally
+            session.cast_vote(voter_id, voted_id)
+            cls.game_log.record(session_id, "vote", voter=voter_id, voted=voted_id)
+
+            # Close voting early once every human still in the game has voted
+            if session.voting_complete():
+                cls.phase_scheduler.fire_now(phase_timer(session_id))
+            return True
 
     @classmethod
+    @metrics.timed("initiate_voting")
     async def initiate_voting(cls, session_id: str):
         """
-        Initiates the voting process for a session.
+        Opens the voting phase for a session and schedules the count.
         """
-        # Retrieve the session using session_id
-        session = cls.sessions.get(session_id)
-        if not session:
-            await cls.broadcast_message(session_id, {"type": "error", "message": "Session not found."})
-            return
-
-        # Broadcast voting start
+        async with cls.store.update(session_id) as session:
+            if not session:
+                return
+            session.set_phase(GamePhase.VOTING)
+        cls.game_log.record(session_id, "phase", phase=GamePhase.VOTING.value)
+
+        # Broadcast voting start; candidates are shuffled, since join order
+        # would always list the AI first
+        candidates = [{"id": p.id, "name": p.name} for p in session.players.values()]
+        random.shuffle(candidates)
         voting_start_message = {
             "type": "voting_start",
-            "message": "Time is up! Cast your votes for who you think the AI is."
+            "message": "Time is up! Cast your votes for who you think the AI is.",
+            "duration": cls.settings.game_voting_seconds,
+            "candidates": candidates
         }
         await cls.broadcast_message(session_id, voting_start_message)
 
         # Allow time for voting
-        await asyncio.sleep(15)  # Adjust duration as needed
-
-        # Tally votes
-        vote_counts = {}
-        for target_id in session.votes.values():
-            vote_counts[target_id] = vote_counts.get(target_id, 0) + 1
+        cls.phase_scheduler.schedule(phase_timer(session_id), cls.settings.game_voting_seconds, lambda: cls.conclude_voting(session_id))
 
-        # Broadcast voting results
-        vote_results = {player_id: count for player_id, count in vote_counts.items()}
+    @classmethod
+    async def conclude_voting(cls, session_id: str):
+        """
+        Counts the round's votes and eliminates the most voted player, unless
+        the vote was tied or most players abstained. The game then either ends
+        or moves on to the next round.
+        """
+        async with cls.store.update(session_id) as session:
+            if not session:
+                return
+            session.set_phase(GamePhase.RESULTS)
+            eliminated_id, outcome = session.resolve_votes()
+            eliminated_player = session.eliminate(eliminated_id) if eliminated_id is not None else None
+            winner = session.winner(cls.settings.game_max_rounds)
+        cls.game_log.record(session_id, "phase", phase=GamePhase.RESULTS.value)
+
+        # Broadcast voting results; the tally is kept up to date as votes are cast
+        vote_results = {("abstain" if target == ABSTAIN else target): count
+                        for target, count in session.vote_counts.items()}
         await cls.broadcast_message(session_id, {
             "type": "voting_result",
             "message": f"Voting has concluded. Results: {json.dumps(vote_results)}"
         })
 
-        if not vote_counts:
-            await cls.broadcast_message(session_id, {"type": "voting_result", "message": "No votes cast. Game will now end."})
-            await cls.end_session(session_id)
-            return
-
-        # Determine the player with the most votes
-        highest_votes = max(vote_counts.values())
-        eliminated_id = next((target_id for target_id, count in vote_counts.items() if count == highest_votes), None)
-
-        # Handle elimination
-        eliminated_player = next((p for p in session.players if p.id == eliminated_id), None)
         if eliminated_player:
-            session.players.remove(eliminated_player)
-            session.eliminated.append(eliminated_player)  # Add to eliminated list
-
-            # Broadcast elimination
-            elimination_message = {
+            cls.game_log.record(session_id, "eliminate", id=eliminated_player.id)
+            await cls.broadcast_message(session_id, {
                 "type": "elimination",
                 "message": f"Player {eliminated_player.name} has been eliminated."
-            }
-            await cls.broadcast_message(session_id, elimination_message)
+            })
+        else:
+            await cls.broadcast_message(session_id, {"type": "voting_result", "message": NO_ELIMINATION[outcome]})
 
-            # Check if the eliminated player is the AI
-            if eliminated_player.is_ai:
-                await cls.broadcast_message(session_id, {"type": "game_over", "message": "Game Over! The players win!"})
-            else:
-                await cls.broadcast_message(session_id, {"type": "game_over", "message": "Game Over! The players failed to eliminate the AI."})
+        if winner == "humans":
+            await cls.broadcast_message(session_id, {"type": "game_over", "message": "Game Over! The players win!"})
+        elif winner == "ai":
+            await cls.broadcast_message(session_id, {"type": "game_over", "message": "Game Over! The players failed to eliminate the AI."})
 
-            # End the session
+        if winner:
             await cls.end_session(session_id)
         else:
-            await cls.broadcast_message(session_id, {"type": "error", "message": "Error determining elimination. Game will now end."})
-            await cls.end_session(session_id)
+            cls.phase_scheduler.schedule(phase_timer(session_id), cls.settings.game_results_seconds, lambda: cls.start_round(session_id))
 
     @classmethod
     async def end_session(cls, session_id: str):
         """
         Ends the session, notifying all players and closing the connections.
         """
-        session = cls.sessions.get(session_id)
-        if not session:
-            print(f"Session {session_id} not found during cleanup.")
+        if not await cls.store.exists(session_id):
+            logger.info("Session %s not found during cleanup.", session_id)
             return
 
-        # Notify players that the game has ended
-        await cls.broadcast_message(session_id, {"type": "game_over", "message": "The game has ended."})
+        # Notify players that the game has ended; this also closes their connections
+        # (on every worker) with a code that tells clients not to resume
+        await cls.broadcast_message(session_id, {"type": "session_closed", "message": "The game has ended."})
 
-        # Clean up session and connections
-        cls.sessions.pop(session_id, None)
-        cls.connections.pop(session_id, None)
-        print(f"Session {session_id} successfully cleaned up.")
+        # Clean up the session; local connections go away as their sockets close,
+        # so the final messages above still reach them from any worker
+        await cls.store.delete(session_id)
+        cls.game_log.record(session_id, "end", reason="game_over")
+        cls.forget_local_state(session_id)
+        logger.info("Session %s successfully cleaned up.", session_id)
 
-@classmethod
-async def initiate_voting(cls, session_id: str):
-    """
-    Initiates the voting process for a session.
-    """
-    # Retrieve the session using session_id
-    session = cls.sessions.get(session_id)
-    if not session:
-        await cls.broadcast_message(session_id, {"type": "error", "message": "Session not found."})
-        return
-
-    # Broadcast voting start
-    voting_start_message = {
-        "type": "voting_start",
-        "message": "Time is up! Cast your votes for who you think the AI is."
-    }
-    await cls.broadcast_message(session_id, voting_start_message)
-
-    # Allow time for voting
-    await asyncio.sleep(15)  # Adjust duration as needed
-
-    # Tally votes
-    vote_counts = {}
-    for target_id in session.votes.values():
-        vote_counts[target_id] = vote_counts.get(target_id, 0) + 1
-
-    if not vote_counts:
-        await cls.broadcast_message(session_id, {"type": "voting_result", "message": "No votes cast. Game will now end."})
-        await cls.end_session(session_id)
-        return
-
-    # Determine the player with the most votes
-    highest_votes = max(vote_counts.values())
-    most_voted_id = next((target_id for target_id, count in vote_counts.items() if count == highest_votes), None)
-
-    # Find the player's name
-    most_voted_player = next((p.name for p in session.players if p.id == most_voted_id), "Unknown")
-
-    # Broadcast the voting results
-    voting_result_message = {
-        "type": "voting_result",
-        "message": f"The player with the most votes is {most_voted_player} with {highest_votes} vote(s)."
-    }
-    await cls.broadcast_message(session_id, voting_result_message)
-
-    # Handle elimination
-    eliminated_player = next((p for p in session.players if p.id == most_voted_id), None)
-    if eliminated_player:
-        session.players.remove(eliminated_player)
-        session.eliminated.append(eliminated_player)
-
-        # Broadcast elimination
-        elimination_message = {
-            "type": "elimination",
-            "message": f"Player {eliminated_player.name} has been eliminated."
-        }
-        await cls.broadcast_message(session_id, elimination_message)
+    @classmethod
+    def forget_local_state(cls, session_id: str):
+        """Drop this worker's timers, AI scheduler and caches for a session."""
+        cls.phase_scheduler.cancel(phase_timer(session_id))
+        cls.matchmaker.remove(session_id)
+        cls.prompt_builders.pop(session_id, None)
+        cls.recent.pop(session_id, None)
+        cls.session_chat_limiter.forget(session_id)
+        cls.canned_replies.forget_session(session_id)
+        cls.response_cache.forget_session(session_id)
+        scheduler = cls.ai_schedulers.pop(session_id, None)
+        if scheduler:
+            scheduler.cancel()
 
-        # Check if the eliminated player is the AI
-        if eliminated_player.is_ai:
-            await cls.broadcast_message(session_id, {"type": "game_over", "message": "Game Over! The players win!"})
-        else:
-            await cls.broadcast_message(session_id, {"type": "game_over", "message": "Game Over! The players failed to eliminate the AI."})
+    @classmethod
+    async def close_session(cls, session_id: str, reason: str):
+        """
+        Shut down a session that is not ending through a finished game: tell
+        its players why, close their connections on every worker and delete it.
+        """
+        await cls.broadcast_message(session_id, {"type": "session_closed", "message": reason})
+        await cls.store.delete(session_id)
+        cls.game_log.record(session_id, "end", reason=reason)
+        cls.forget_local_state(session_id)
 
-        # End the session
-        await cls.end_session(session_id)
-    else:
-        await cls.broadcast_message(session_id, {"type": "error", "message": "Error determining elimination. Game will now end."})
-        await cls.end_session(session_id)
+    @classmethod
+    async def recover_sessions(cls):
+        """
+        Put games that were still running at the last shutdown or crash back
+        into the store from the game log, and restart their phase timers.
+        Sessions the store still has (e.g. in Redis) are left alone.
 
+        Every human starts out disconnected: they resume with their logged
+        token within WS_RECONNECT_GRACE or lose their seat, so a game nobody
+        comes back to ends instead of running on with absent players.
+        """
+        for session in await cls.game_log.recover():
+            session_id = session.session_id
+            dropped_at = datetime.now()
+            for player in session.humans():
+                session.disconnected[player.id] = dropped_at
+            if not await cls.store.create(session):
+                continue
+            for player in session.humans():
+                cls.schedule_leave(session_id, player, dropped_at)
+            if session.phase == GamePhase.CHAT and session.end_time:
+                remaining = max(0.0, (session.end_time - datetime.now()).total_seconds())
+                cls.phase_scheduler.schedule(phase_timer(session_id), remaining, lambda s=session_id: cls.initiate_voting(s))
+            elif session.phase == GamePhase.VOTING:
+                cls.phase_scheduler.schedule(phase_timer(session_id), cls.settings.game_voting_seconds, lambda s=session_id: cls.conclude_voting(s))
+            elif session.phase == GamePhase.RESULTS:
+                if session.winner(cls.settings.game_max_rounds):
+                    await cls.end_session(session_id)
+                    continue
+                cls.phase_scheduler.schedule(phase_timer(session_id), cls.settings.game_results_seconds, lambda s=session_id: cls.start_round(s))
+            logger.info("Recovered session %s (%s) from the game log.", session_id, session.phase.value)
+
+    @classmethod
+    async def reap_sessions(cls):
+        """Periodic sweep: close expired sessions, enforce the cap and prune local leftovers."""
+        try:
+            # With several workers sharing a store, one sweep per interval is enough
+            if await cls.store.claim("reaper", ttl=cls.reaper.interval * 0.9):
+                summaries = await cls.store.summaries()
+                sample = [await cls.store.get(session_id) for session_id in cls.reaper.size_sample(summaries)]
+                sizes = [len(session.model_dump_json().encode()) for session in sample if session is not None]
+                expired, evicted = cls.reaper.sweep(summaries, sizes)
+                for session_id in expired:
+                    await cls.close_session(session_id, "This session was closed after being idle for too long.")
+                for session_id in evicted:
+                    await cls.close_session(session_id, "This session was closed to make room for new games.")
+
+            # State for sessions that ended on another worker
+            local_ids = set(cls.connections) | set(cls.ai_schedulers) | set(cls.prompt_builders) | set(cls.recent)
+            for session_id in local_ids:
+                if not await cls.store.exists(session_id):
+                    cls.forget_local_state(session_id)
+                    if cls.connections.get(session_id):
+                        Broadcaster.close_after_flush(cls.connections[session_id], CLOSE_SESSION_OVER)
+                    else:
+                        cls.connections.pop(session_id, None)
+        finally:
+            cls.phase_scheduler.schedule(REAPER_TIMER, cls.reaper.interval, cls.reap_sessions)
+
+    @classmethod
+    async def ensure_capacity(cls):
+        """Evict the least recently active sessions if creating one more would exceed MAX_SESSIONS."""
+        overflow = await cls.store.count() - cls.reaper.max_sessions + 1
+        if overflow <= 0:
+            return
+        # Evict a batch at once so a full server does not rescan on every new session
+        count = max(overflow, cls.reaper.eviction_batch())
+        evicted = cls.reaper.pick_evictions(await cls.store.summaries(), count)
+        for session_id in evicted:
+            await cls.close_session(session_id, "This session was closed to make room for new games.")
+        cls.reaper.stats["evicted_total"] += len(evicted)
+
+    @classmethod
+    async def collect_metrics(cls) -> str:
+        """Refresh the point-in-time gauges and render every metric for /metrics."""
+        metrics.ACTIVE_SESSIONS.set(await cls.store.count())
+        metrics.ACTIVE_PLAYERS.set(sum(len(c) for c in cls.connections.values()))
+        metrics.ACTIVE_WEBSOCKETS.set(len(Broadcaster.writers))
+        metrics.LLM_QUEUE_DEPTH.set(len(cls.llm_dispatcher.heap))
+        metrics.LLM_WORKERS.set(cls.llm_dispatcher.limit)
+        metrics.MATCH_OPEN_LOBBIES.set(cls.matchmaker.open_lobbies())
+        metrics.MATCH_RESERVATIONS.set(cls.matchmaker.reservations())
+        metrics.RESPONSE_CACHE_HIT_RATIO.set(cls.response_cache.hit_ratio())
+        return metrics.render()
+
+    @classmethod
+    def session_metrics(cls) -> Dict[str, float]:
+        """Figures from the last reaper sweep plus this worker's live connections."""
+        stats = dict(cls.reaper.stats)
+        stats["local_sessions"] = len(cls.connections)
+        stats["local_connections"] = sum(len(c) for c in cls.connections.values())
+        return stats
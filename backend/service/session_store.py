@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+from config import Settings, get_settings
+from model.session import GamePhase, GameSession
+
+logger = logging.getLogger(__name__)
+
+# Called with (session_id, message) for every broadcast this worker should deliver
+BroadcastHandler = Callable[[str, dict], None]
+
+# How long a worker may hold a session's write lock before it expires
+LOCK_TTL_MS = 5000
+
+
+class SessionSummary(NamedTuple):
+    """The few fields the reaper needs, so a sweep never loads whole sessions."""
+    session_id: str
+    last_activity: float  # Timestamp
+    phase: GamePhase
+    has_humans: bool
+    size: Optional[int] = None  # Serialized size in bytes, if the store knows it
+
+    @classmethod
+    def of(cls, session: GameSession, size: Optional[int] = None) -> "SessionSummary":
+        has_humans = any(not p.is_ai for p in session.players.values())
+        return cls(session.session_id, session.last_activity.timestamp(), session.phase, has_humans, size)
+
+    def encode(self) -> str:
+        return f"{self.last_activity}|{self.phase.value}|{int(self.has_humans)}|{self.size}"
+
+    @classmethod
+    def decode(cls, session_id: str, data: str) -> "SessionSummary":
+        last_activity, phase, has_humans, size = data.split("|")
+        return cls(session_id, float(last_activity), GamePhase(phase), has_humans == "1", int(size))
+
+
+class SessionStore:
+    """
+    Where GameSession state lives, plus the channel broadcasts travel on.
+
+    WebSocket connections always stay local to the worker that accepted them;
+    everything a different worker needs to serve a session goes through here.
+    """
+
+    async def get(self, session_id: str) -> Optional[GameSession]:
+        raise NotImplementedError
+
+    async def save(self, session: GameSession):
+        raise NotImplementedError
+
+    async def create(self, session: GameSession) -> bool:
+        """Save a new session unless one with its ID already exists. Returns whether it was created."""
+        raise NotImplementedError
+
+    async def next_id(self, name: str) -> int:
+        """Atomically increment and return the counter `name`, shared by every worker."""
+        raise NotImplementedError
+
+    async def delete(self, session_id: str):
+        """Delete the session along with its message sequence counter."""
+        raise NotImplementedError
+
+    async def exists(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    @asynccontextmanager
+    async def update(self, session_id: str) -> AsyncIterator[Optional[GameSession]]:
+        """
+        Read-modify-write a session. Yields None if the session does not exist;
+        otherwise the session is saved when the block exits without an error.
+        """
+        session = await self.get(session_id)
+        yield session
+        if session is not None:
+            await self.save(session)
+
+    async def summaries(self) -> List[SessionSummary]:
+        """A SessionSummary for every session, for the reaper."""
+        raise NotImplementedError
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        """Take a short lease on `key` across workers. Returns False if someone else holds it."""
+        return True
+
+    async def publish(self, session_id: str, message: dict):
+        raise NotImplementedError
+
+    async def subscribe(self, handler: BroadcastHandler):
+        """Start delivering published messages to `handler`."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """Single-process store; sessions are plain objects in a dict."""
+
+    def __init__(self):
+        self.sessions: Dict[str, GameSession] = {}
+        self.counters: Dict[str, int] = {}
+        self.handler: Optional[BroadcastHandler] = None
+
+    async def get(self, session_id: str) -> Optional[GameSession]:
+        return self.sessions.get(session_id)
+
+    async def save(self, session: GameSession):
+        self.sessions[session.session_id] = session
+
+    async def create(self, session: GameSession) -> bool:
+        # No await between the check and the insert, so this is atomic on the event loop
+        if session.session_id in self.sessions:
+            return False
+        self.sessions[session.session_id] = session
+        return True
+
+    async def next_id(self, name: str) -> int:
+        self.counters[name] = self.counters.get(name, 0) + 1
+        return self.counters[name]
+
+    async def delete(self, session_id: str):
+        self.sessions.pop(session_id, None)
+        self.counters.pop(f"seq:{session_id}", None)
+
+    async def exists(self, session_id: str) -> bool:
+        return session_id in self.sessions
+
+    async def count(self) -> int:
+        return len(self.sessions)
+
+    async def summaries(self) -> List[SessionSummary]:
+        # Sessions are never serialized here, so sizes are left to the reaper to sample
+        return [SessionSummary.of(session) for session in self.sessions.values()]
+
+    async def publish(self, session_id: str, message: dict):
+        if self.handler:
+            self.handler(session_id, message)
+
+    async def subscribe(self, handler: BroadcastHandler):
+        self.handler = handler
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Shared store for running several workers or nodes. Sessions are kept as
+    JSON under one key each and broadcasts go over pub/sub, so every worker
+    delivers them to its own local connections.
+
+    `client` is any redis.asyncio.Redis-compatible client created with
+    decode_responses=True (fakeredis.aioredis.FakeRedis works for tests).
+    """
+
+    def __init__(self, client, prefix: str = "aimong"):
+        self.client = client
+        self.prefix = prefix
+        self.pubsub = None
+        self.listener: Optional[asyncio.Task] = None
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}"
+
+    def _channel(self, session_id: str) -> str:
+        return f"{self.prefix}:broadcast:{session_id}"
+
+    async def _index(self, session: GameSession, data: str):
+        # Every write also refreshes the session's summary, so sweeps read one small hash
+        await self.client.sadd(f"{self.prefix}:sessions", session.session_id)
+        summary = SessionSummary.of(session, len(data.encode()))
+        await self.client.hset(f"{self.prefix}:summaries", session.session_id, summary.encode())
+
+    async def get(self, session_id: str) -> Optional[GameSession]:
+        data = await self.client.get(self._key(session_id))
+        if data is None:
+            return None
+        return GameSession.model_validate_json(data)
+
+    async def save(self, session: GameSession):
+        data = session.model_dump_json()
+        await self.client.set(self._key(session.session_id), data)
+        await self._index(session, data)
+
+    async def create(self, session: GameSession) -> bool:
+        data = session.model_dump_json()
+        if not await self.client.set(self._key(session.session_id), data, nx=True):
+            return False
+        await self._index(session, data)
+        return True
+
+    async def next_id(self, name: str) -> int:
+        return await self.client.incr(f"{self.prefix}:ids:{name}")
+
+    async def delete(self, session_id: str):
+        # Under the session's lock, so an update in flight can't save it back afterwards
+        async with self._lock(session_id):
+            await self.client.delete(self._key(session_id), f"{self.prefix}:ids:seq:{session_id}")
+            await self.client.srem(f"{self.prefix}:sessions", session_id)
+            await self.client.hdel(f"{self.prefix}:summaries", session_id)
+
+    async def exists(self, session_id: str) -> bool:
+        return bool(await self.client.exists(self._key(session_id)))
+
+    async def count(self) -> int:
+        return await self.client.scard(f"{self.prefix}:sessions")
+
+    async def summaries(self) -> List[SessionSummary]:
+        entries = await self.client.hgetall(f"{self.prefix}:summaries")
+        return [SessionSummary.decode(session_id, data) for session_id, data in entries.items()]
+
+    @asynccontextmanager
+    async def _lock(self, session_id: str) -> AsyncIterator[None]:
+        # Serialize writers to the same session across workers with a SET NX lease;
+        # plain commands only, so stand-ins without Lua scripting work too
+        lock_key = f"{self.prefix}:lock:{session_id}"
+        token = uuid.uuid4().hex
+        while not await self.client.set(lock_key, token, nx=True, px=LOCK_TTL_MS):
+            await asyncio.sleep(0.005)
+        try:
+            yield
+        finally:
+            if await self.client.get(lock_key) == token:
+                await self.client.delete(lock_key)
+
+    @asynccontextmanager
+    async def update(self, session_id: str) -> AsyncIterator[Optional[GameSession]]:
+        async with self._lock(session_id):
+            session = await self.get(session_id)
+            yield session
+            if session is not None:
+                await self.save(session)
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        return bool(await self.client.set(f"{self.prefix}:claim:{key}", "1", nx=True, px=int(ttl * 1000)))
+
+    async def publish(self, session_id: str, message: dict):
+        await self.client.publish(self._channel(session_id), json.dumps(message))
+
+    async def subscribe(self, handler: BroadcastHandler):
+        self.pubsub = self.client.pubsub()
+        await self.pubsub.psubscribe(self._channel("*"))
+        self.listener = asyncio.create_task(self._listen(handler))
+
+    async def _listen(self, handler: BroadcastHandler):
+        prefix = self._channel("")
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message["type"] == "pmessage":
+                    handler(message["channel"][len(prefix):], json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Broadcast listener error")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self.listener:
+            self.listener.cancel()
+        if self.pubsub:
+            await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+def create_session_store(settings: Optional[Settings] = None) -> SessionStore:
+    """Build the store selected by SESSION_STORE ("memory" or "redis")."""
+    settings = settings or get_settings()
+    backend = settings.session_store
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("SESSION_STORE=redis requires the 'redis' package")
+        client = redis.from_url(settings.redis_url, decode_responses=True)
+        return RedisSessionStore(client)
+    raise ValueError(f"Unknown session store: {backend}")
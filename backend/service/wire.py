@@ -0,0 +1,145 @@
+"""
+Wire encodings for the /ws/{session_id} endpoint.
+
+JSON text frames are the default. Clients that offer the "aimong.msgpack.v1"
+WebSocket subprotocol (or connect with ?encoding=msgpack) get binary msgpack
+frames instead, where the well-known keys and message types are replaced by
+small integers:
+
+    {"type": "chat", "author": "Player 2", "message": "hi"}
+    -> {0: 1, 2: "Player 2", 1: "hi"}
+
+Compression (permessage-deflate) is negotiated by the server for the whole
+connection, independently of the encoding chosen here.
+"""
+import json
+from typing import Dict, Iterable, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; everyone falls back to JSON
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+SUBPROTOCOLS = {
+    "aimong.msgpack.v1": MSGPACK,
+    "aimong.json.v1": JSON,
+}
+
+# Field names shared by server messages and client actions
+FIELD_CODES: Dict[str, int] = {
+    "type": 0,
+    "message": 1,
+    "author": 2,
+    "action": 3,
+    "voted_id": 4,
+    "message_id": 5,
+    "delta": 6,
+    "active": 7,
+    "player_count": 8,
+    "max_players": 9,
+    "seq": 10,
+    "token": 11,
+    "player_id": 12,
+    "round": 13,
+    "duration": 14,
+    "candidates": 15,
+}
+
+# Values of "type" (server -> client) and "action" (client -> server)
+TYPE_CODES: Dict[str, int] = {
+    "chat": 1,
+    "player_join": 2,
+    "player_leave": 3,
+    "vote_cast": 4,
+    "error": 5,
+    "start_game": 6,
+    "voting_start": 7,
+    "voting_result": 8,
+    "elimination": 9,
+    "game_over": 10,
+    "backlog_compacted": 11,
+    "typing": 12,
+    "chat_delta": 13,
+    "session_closed": 14,
+    "round_start": 15,
+    "lobby_update": 16,
+    "ping": 17,
+    "welcome": 18,
+    "resumed": 19,
+}
+ACTION_CODES: Dict[str, int] = {
+    "chat": 1,
+    "vote": 2,
+    "pong": 3,
+}
+
+FIELD_NAMES = {code: name for name, code in FIELD_CODES.items()}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+Frame = Union[str, bytes]
+
+
+def available_encodings() -> Iterable[str]:
+    return (JSON, MSGPACK) if msgpack else (JSON,)
+
+
+def negotiate(offered_subprotocols: Iterable[str], requested: Optional[str] = None):
+    """
+    Pick the encoding for a new connection.
+    Returns (encoding, subprotocol to echo back or None).
+    """
+    for subprotocol in offered_subprotocols:
+        encoding = SUBPROTOCOLS.get(subprotocol)
+        if encoding in available_encodings():
+            return encoding, subprotocol
+    if requested in available_encodings():
+        return requested, None
+    return JSON, None
+
+
+def compact(message: dict) -> dict:
+    packed = {}
+    for key, value in message.items():
+        if key == "type":
+            value = TYPE_CODES.get(value, value)
+        elif key == "action":
+            value = ACTION_CODES.get(value, value)
+        packed[FIELD_CODES.get(key, key)] = value
+    return packed
+
+
+def expand(packed: dict) -> dict:
+    message = {}
+    for key, value in packed.items():
+        name = FIELD_NAMES.get(key, key)
+        if name == "type":
+            value = TYPE_NAMES.get(value, value)
+        elif name == "action":
+            value = ACTION_NAMES.get(value, value)
+        message[name] = value
+    return message
+
+
+def encode(message: dict, encoding: str = JSON) -> Frame:
+    if encoding == MSGPACK:
+        return msgpack.packb(compact(message))
+    return json.dumps(message)
+
+
+def decode(frame: Frame, encoding: str = JSON) -> dict:
+    """Decode a client frame; raises ValueError unless it holds an object."""
+    try:
+        if encoding == MSGPACK:
+            message = msgpack.unpackb(frame, strict_map_key=False)
+            message = expand(message) if isinstance(message, dict) else message
+        else:
+            message = json.loads(frame)
+    except (ValueError, TypeError, msgpack.UnpackException if msgpack else ValueError) as e:
+        raise ValueError(f"Malformed {encoding} frame: {e}") from e
+    if not isinstance(message, dict):
+        raise ValueError(f"Expected an object, got {type(message).__name__}")
+    return message
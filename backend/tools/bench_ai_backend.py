@@ -0,0 +1,105 @@
+"""
+Compare AI backends on the prompts of recorded games.
+
+    python -m tools.bench_ai_backend game_logs/ [--backends local,hosted] [--limit 200]
+
+Replays each game log and, at every human chat message, renders the prompt
+the AI would have seen at that point (with PromptBuilder, as in a live game).
+Every backend then answers the same prompts one at a time. The report gives
+per-backend latency percentiles, mean reply length and the error count.
+The hosted backend needs OPENAI_API_KEY (or an OPENAI_BASE_URL such as
+tools.llm_stub); the local one runs offline.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import time
+from typing import Dict, List
+
+from service.ai_backend import create_ai_backend
+from service.game_log import apply_event, read_events
+from service.prompt_builder import PromptBuilder
+
+
+def collect_prompts(paths: List[str], limit: int) -> List[List[Dict]]:
+    prompts = []
+    for path in paths:
+        session = None
+        builder = None
+        for event in read_events(path):
+            session = apply_event(session, event)
+            if event["e"] == "create":
+                builder = None
+            if event["e"] != "chat" or session is None or session.ai_player is None:
+                continue
+            if builder is None:
+                builder = PromptBuilder(session)
+            prompts.append(builder.build(session))
+            if len(prompts) >= limit:
+                return prompts
+    return prompts
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def bench(name: str, prompts: List[List[Dict]]) -> dict:
+    backend = create_ai_backend(name)
+    latencies = []
+    lengths = []
+    errors = 0
+    try:
+        # Pool start-up and connection setup aren't counted
+        await backend.start()
+        await backend.complete(prompts[0])
+        for messages in prompts:
+            start = time.perf_counter()
+            try:
+                reply = await backend.complete(messages)
+            except Exception as e:
+                errors += 1
+                print(f"{name}: {e}")
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            lengths.append(len(reply))
+    finally:
+        await backend.close()
+    return {
+        "backend": name,
+        "prompts": len(prompts),
+        "errors": errors,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.5), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "mean": round(statistics.mean(latencies), 2),
+        } if latencies else None,
+        "mean_reply_chars": round(statistics.mean(lengths), 1) if lengths else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="+", help="session-<id>.jsonl files or directories of them")
+    parser.add_argument("--backends", default="local", help="comma-separated AI_BACKEND names")
+    parser.add_argument("--limit", type=int, default=200, help="most prompts to replay")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.logs:
+        paths.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path])
+    prompts = collect_prompts(paths, args.limit)
+    if not prompts:
+        print("No human chat messages found in the logs.")
+        return
+
+    report = [asyncio.run(bench(name, prompts)) for name in args.backends.split(",")]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
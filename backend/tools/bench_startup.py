@@ -0,0 +1,75 @@
+"""
+Measure how fast a backend worker starts.
+
+    python -m tools.bench_startup [--runs 5] [--port 8020]
+
+Each run starts a fresh interpreter. "import" is the time to import main and
+build the app, and "healthy" is the time from launching
+`uvicorn main:create_app --factory` until GET /healthz answers. The report
+also says whether the OpenAI SDK was imported by then; it should not be,
+since the hosted backend loads it in the background after start-up.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "main.create_app()\n"
+    "print(time.perf_counter() - start, 'openai' in sys.modules)\n"
+)
+
+
+def time_import() -> dict:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True)
+    seconds, openai_loaded = output.stdout.split()
+    return {"seconds": float(seconds), "openai_loaded": openai_loaded == "True"}
+
+
+def time_healthy(port: int, timeout: float = 30) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:create_app", "--factory", "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"Worker was not healthy after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summary(values) -> dict:
+    return {"p50_ms": round(statistics.median(values) * 1000, 1), "max_ms": round(max(values) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8020)
+    args = parser.parse_args()
+
+    imports = [time_import() for _ in range(args.runs)]
+    healthy = [time_healthy(args.port) for _ in range(args.runs)]
+    print(json.dumps({
+        "runs": args.runs,
+        "import": summary([run["seconds"] for run in imports]),
+        "openai_loaded_at_import": any(run["openai_loaded"] for run in imports),
+        "healthy": summary(healthy),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
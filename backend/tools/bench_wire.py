@@ -0,0 +1,64 @@
+"""
+Compare the JSON and msgpack wire encodings for typical broadcasts.
+
+    python -m tools.bench_wire [--connections 5] [--rounds 20000]
+
+For each message it reports the encoded size (raw and deflated, which is what
+permessage-deflate roughly sends), and the encode cost of one broadcast: the
+message is encoded once per encoding and the same frame is queued for every
+connection.
+"""
+import argparse
+import time
+import zlib
+
+from service import wire
+
+SAMPLE_MESSAGES = [
+    {"type": "chat", "author": "Player 3", "message": "wassup guys who do u think is the ai"},
+    {"type": "player_join", "message": "Player 4 has joined the session."},
+    {"type": "vote_cast", "message": "Player 2 voted for Player 5."},
+    {"type": "voting_start", "message": "Time is up! Cast your votes for who you think the AI is."},
+]
+
+
+def bench(encoding: str, connections: int, rounds: int):
+    sizes = []
+    deflated = []
+    for message in SAMPLE_MESSAGES:
+        frame = wire.encode(message, encoding)
+        raw = frame.encode() if isinstance(frame, str) else frame
+        sizes.append(len(raw))
+        deflated.append(len(zlib.compress(raw)))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in SAMPLE_MESSAGES:
+            frame = wire.encode(message, encoding)
+            queued = [frame] * connections  # stands in for enqueueing on each writer
+    elapsed = time.perf_counter() - start
+    broadcasts = rounds * len(SAMPLE_MESSAGES)
+    return {
+        "encoding": encoding,
+        "avg_bytes": sum(sizes) / len(sizes),
+        "avg_deflated_bytes": sum(deflated) / len(deflated),
+        "bytes_per_broadcast": sum(sizes) / len(sizes) * connections,
+        "us_per_broadcast": elapsed / broadcasts * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'encoding':<10}{'bytes':>8}{'deflated':>10}{'bytes/bcast':>13}{'us/bcast':>10}")
+    for encoding in wire.available_encodings():
+        result = bench(encoding, args.connections, args.rounds)
+        print(f"{result['encoding']:<10}{result['avg_bytes']:>8.1f}{result['avg_deflated_bytes']:>10.1f}"
+              f"{result['bytes_per_broadcast']:>13.1f}{result['us_per_broadcast']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
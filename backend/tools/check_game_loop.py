@@ -0,0 +1,183 @@
+"""
+Play one scripted game through SessionService and check every phase change.
+
+    python -m tools.check_game_loop [--store redis] [--stub-port 8013]
+
+The phase timers run on a ManualClock, so no real time passes between
+phases: the script advances the clock past each deadline instead. Players
+are in-process stand-ins for WebSocket connections that record what they
+are sent. The AI's reply comes from tools.llm_stub, served on --stub-port.
+--store redis plays the game on the Redis store, backed by fakeredis rather
+than a server. Exits with an error at the first check that fails.
+
+The game: three players and the AI. Round 1 ends in a tie with an
+abstention, round 2 eliminates a player (who can no longer chat or vote),
+and round 3 votes out the AI, which ends and closes the session.
+"""
+import argparse
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+# Real time given after each step for phase callbacks and queued sends to run
+SETTLE_SECONDS = 0.05
+
+
+class FakeSocket:
+    """Records the frames and close code a connection would receive."""
+
+    def __init__(self):
+        self.received: List[dict] = []
+        self.close_code: Optional[int] = None
+
+    async def send_text(self, frame: str):
+        self.received.append(json.loads(frame))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+    def types(self) -> List[str]:
+        return [message.get("type") for message in self.received]
+
+    def last(self, kind: str) -> Optional[dict]:
+        return next((m for m in reversed(self.received) if m.get("type") == kind), None)
+
+
+def check(condition: bool, what: str):
+    if not condition:
+        raise SystemExit(f"FAILED: {what}")
+    print(f"ok  {what}")
+
+
+async def play(store: str):
+    from model.session import GamePhase
+    from service.broadcaster import CLOSE_SESSION_OVER
+    from service.phase_scheduler import ManualClock, PhaseScheduler
+    from service.session_service import (
+        HEARTBEAT_TIMER, NO_ELIMINATION, REAPER_TIMER, GameInProgressError, SessionService, reserved_session_id,
+    )
+    from service.session_store import RedisSessionStore
+
+    SessionService.configure()
+    if store == "redis":
+        import fakeredis.aioredis
+        SessionService.store = RedisSessionStore(fakeredis.aioredis.FakeRedis(decode_responses=True))
+    clock = ManualClock()
+    SessionService.phase_scheduler = PhaseScheduler(clock)
+    chat_seconds = SessionService.settings.game_chat_seconds
+    results_seconds = SessionService.settings.game_results_seconds
+
+    async def advance(seconds: float):
+        await asyncio.sleep(0)
+        clock.advance(seconds)
+        await asyncio.sleep(SETTLE_SECONDS)
+
+    async def phase() -> Optional[GamePhase]:
+        session = await SessionService.store.get(session_id)
+        return session.phase if session else None
+
+    await SessionService.start()
+    await SessionService.wait_recovered()
+    try:
+        timers = (REAPER_TIMER, HEARTBEAT_TIMER)
+        check(all(reserved_session_id(timer) for timer in timers), "no session can take the worker's timer keys")
+        session_id = await SessionService.create_session()
+        sockets = [FakeSocket() for _ in range(3)]
+        players = [await SessionService.add_player_to_session(session_id, socket) for socket in sockets]
+        one, two, three = players
+        await asyncio.sleep(SETTLE_SECONDS)
+        check(all("welcome" in s.types() for s in sockets), "every player is welcomed with a resume token")
+
+        # Round 1: chat, the AI answers, then a tie with an abstention
+        await SessionService.start_game_for_session(session_id)
+        await asyncio.sleep(SETTLE_SECONDS)
+        check(await phase() == GamePhase.CHAT, "the game starts in the chat phase")
+        check(all(s.last("round_start")["round"] == 1 for s in sockets), "players are told round 1 began")
+        check(not await SessionService.cast_vote(session_id, one.id, two.id), "votes are refused while chatting")
+
+        await SessionService.handle_message(session_id, one, "so what is everyone up to this weekend")
+        await SessionService.generate_ai_response(session_id, accused=True)
+        await asyncio.sleep(SETTLE_SECONDS)
+        session = await SessionService.store.get(session_id)
+        check(session.messages[-1].sender_id == session.ai_player.id, "the AI replies through the LLM stub")
+        check(sockets[1].last("chat")["author"] == session.ai_player.name, "the AI's reply is broadcast")
+
+        await advance(chat_seconds)
+        check(await phase() == GamePhase.VOTING, "chat time running out opens the vote")
+        candidates = {c["id"] for c in sockets[0].last("voting_start")["candidates"]}
+        check(candidates == {0, one.id, two.id, three.id}, "the vote lists every player still in")
+
+        await SessionService.cast_vote(session_id, one.id, two.id)
+        await SessionService.cast_vote(session_id, two.id, one.id)
+        await SessionService.cast_vote(session_id, three.id, None)
+        await asyncio.sleep(SETTLE_SECONDS)
+        check(await phase() == GamePhase.RESULTS, "the vote closes once every player has voted")
+        messages = [m.get("message") for m in sockets[0].received]
+        check(NO_ELIMINATION["abstained"] in messages, "an abstention-heavy tie eliminates nobody")
+
+        # Round 2: player three is voted out
+        await advance(results_seconds)
+        check(await phase() == GamePhase.CHAT, "the results lead into the next round")
+        check(sockets[0].last("round_start")["round"] == 2, "players are told round 2 began")
+        await advance(chat_seconds)
+        await SessionService.cast_vote(session_id, one.id, three.id)
+        await SessionService.cast_vote(session_id, two.id, three.id)
+        await SessionService.cast_vote(session_id, three.id, one.id)
+        await asyncio.sleep(SETTLE_SECONDS)
+        session = await SessionService.store.get(session_id)
+        check(three.id in session.eliminated and three.id not in session.players, "the majority vote eliminates player 3")
+        check(not await SessionService.handle_message(session_id, three, "wait"), "an eliminated player cannot chat")
+        try:
+            await SessionService.add_player_to_session(session_id, FakeSocket())
+            check(False, "nobody can join a game in progress")
+        except GameInProgressError:
+            check(True, "nobody can join a game in progress")
+
+        # Round 3: the players find the AI
+        await advance(results_seconds)
+        await advance(chat_seconds)
+        check(await phase() == GamePhase.VOTING, "round 3 reaches the vote")
+        check(not await SessionService.cast_vote(session_id, three.id, 0), "an eliminated player cannot vote")
+        await SessionService.cast_vote(session_id, one.id, 0)
+        await SessionService.cast_vote(session_id, two.id, 0)
+        await asyncio.sleep(SETTLE_SECONDS)
+        check(sockets[0].last("game_over") is not None, "voting out the AI ends the game")
+        check(not await SessionService.store.exists(session_id), "the ended session is deleted")
+        check(all(s.close_code == CLOSE_SESSION_OVER for s in sockets[:2]), "connections close as not resumable")
+        pending = SessionService.phase_scheduler.pending
+        check(all(timer in pending for timer in timers), "the reaper and heartbeat timers outlive the game")
+    finally:
+        await SessionService.stop()
+
+
+async def main_async(args):
+    # Configure the backend through the environment, which SessionService.configure reads
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.stub_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "check")
+    os.environ["LLM_STUB_LATENCY"] = "0"
+    os.environ["AI_BACKEND"] = "hosted"
+    os.environ["AI_STREAM_MODE"] = "off"
+    os.environ["GAME_LOG_DIR"] = ""
+
+    from tools.llm_stub import app as stub_app
+    from tools.loadtest import serve
+
+    stub, stub_task = await serve(stub_app, args.stub_port)
+    try:
+        await play(args.store)
+    finally:
+        stub.should_exit = True
+        await stub_task
+    print("game loop check passed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", choices=["memory", "redis"], default="memory", help="session store to play on")
+    parser.add_argument("--stub-port", type=int, default=8013, help="port for the LLM stub")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
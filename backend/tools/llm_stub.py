@@ -0,0 +1,81 @@
+"""
+Local stand-in for the chat completions endpoint.
+
+Run it with `uvicorn tools.llm_stub:app --port 8001` and start the backend with
+OPENAI_BASE_URL=http://127.0.0.1:8001/v1 to exercise the AI path without
+calling the hosted model.
+
+LLM_STUB_LATENCY      seconds to wait before answering (default 0.5)
+LLM_STUB_REPLY        text returned as the completion (default "lol idk man")
+LLM_STUB_TOKEN_DELAY  seconds between streamed tokens with "stream": true (default 0.05)
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI()
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(float(os.getenv("LLM_STUB_LATENCY", "0.5")))
+    reply = os.getenv("LLM_STUB_REPLY", "lol idk man")
+    if body.get("stream"):
+        return StreamingResponse(stream_reply(body.get("model", "stub"), reply), media_type="text/event-stream")
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages", [])),
+            "completion_tokens": len(reply) // 4,
+            "total_tokens": 0,
+        },
+    }
+
+
+async def stream_reply(model: str, reply: str):
+    """Send the reply word by word as server-sent chat.completion.chunk events."""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    token_delay = float(os.getenv("LLM_STUB_TOKEN_DELAY", "0.05"))
+    words = reply.split(" ")
+    for index, word in enumerate(words):
+        if index:
+            await asyncio.sleep(token_delay)
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": word if index == 0 else f" {word}"},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    done = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(done)}\n\n"
+    yield "data: [DONE]\n\n"
@@ -0,0 +1,269 @@
+"""
+Load generator for the chat/vote backend.
+
+    python -m tools.loadtest --sessions 1,10,100 --players 4 --output loadtest.json
+
+Runs the backend and the LLM stub (tools/llm_stub.py) in this process, then for
+each session count drives a full game per session: POST /start, every player
+joins /ws/{session_id}, POST /start_game, players chat for the chat phase and
+vote for the AI when voting opens. Clients share the server's event loop, so
+the numbers are best compared against each other rather than read as
+absolute capacity.
+
+Each level reports broadcast latency (send to receive of chat frames, p50/p99),
+delivered messages per second, event-loop lag of the process, growth of
+resident memory per session (simulated clients included) and the number of
+error frames the server sent back (e.g. chat over the rate limit). The chat
+rate limits are off unless --chat-rate/--session-chat-rate set them, so the
+numbers describe the unthrottled workload. Results are written as JSON so
+CI can compare runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import time
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up, i.e. how long the loop was blocked."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self.samples = []
+        self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self.task.cancel()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.delivered = 0
+        self.errors = 0
+        self.rejected = 0  # Error frames from the server
+        self.games_finished = 0
+
+
+async def play(base_url: str, ws_url: str, http, args, stats: Stats, connect_limit: asyncio.Semaphore):
+    """Drive one session from creation to game over."""
+    from websockets.asyncio.client import connect
+
+    response = await http.post(f"{base_url}/start")
+    session_id = response.json()["session_id"]
+    voting_open = asyncio.Event()
+    game_over = asyncio.Event()
+
+    async def reader(ws):
+        async for raw in ws:
+            data = json.loads(raw)
+            kind = data.get("type")
+            if kind == "chat":
+                stats.delivered += 1
+                text = data.get("message") or ""
+                if text.startswith("lt "):
+                    stats.latencies.append(time.perf_counter() - float(text[3:]))
+            elif kind == "error":
+                stats.rejected += 1
+            elif kind == "voting_start":
+                voting_open.set()
+            elif kind == "game_over":
+                game_over.set()
+                return
+
+    async def player():
+        try:
+            async with connect_limit:
+                ws = await connect(f"{ws_url}/ws/{session_id}", max_queue=None)
+        except Exception:
+            stats.errors += 1
+            return
+        task = asyncio.create_task(reader(ws))
+        try:
+            await started.wait()
+            while not voting_open.is_set():
+                await ws.send(json.dumps({"action": "chat", "message": f"lt {time.perf_counter():.6f}"}))
+                try:
+                    await asyncio.wait_for(voting_open.wait(), random.expovariate(1 / args.chat_interval))
+                except asyncio.TimeoutError:
+                    pass
+            await ws.send(json.dumps({"action": "vote", "voted_id": 0}))
+            await asyncio.wait_for(game_over.wait(), args.chat_seconds + args.voting_seconds + 30)
+        except Exception:
+            stats.errors += 1
+        finally:
+            task.cancel()
+            await ws.close()
+
+    started = asyncio.Event()
+    players = [asyncio.create_task(player()) for _ in range(args.players)]
+    # Wait until everyone has joined (the AI counts as a player)
+    while (await http.get(f"{base_url}/get_players/{session_id}")).json().get("player_count", 0) < args.players + 1:
+        await asyncio.sleep(0.05)
+    await http.post(f"{base_url}/start_game", params={"session_id": session_id})
+    started.set()
+    await asyncio.gather(*players, return_exceptions=True)
+    if game_over.is_set():
+        stats.games_finished += 1
+
+
+async def run_level(sessions: int, base_url: str, ws_url: str, args) -> Dict:
+    import httpx
+
+    stats = Stats()
+    monitor = LoopLagMonitor()
+    connect_limit = asyncio.Semaphore(args.connect_concurrency)
+    rss_before = rss_bytes()
+    monitor.start()
+    started = time.perf_counter()
+    limits = httpx.Limits(max_connections=args.connect_concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        await asyncio.gather(*[
+            play(base_url, ws_url, http, args, stats, connect_limit) for _ in range(sessions)
+        ])
+    elapsed = time.perf_counter() - started
+    monitor.stop()
+    peak_rss = rss_bytes()
+
+    return {
+        "sessions": sessions,
+        "players_per_session": args.players,
+        "duration_s": elapsed,
+        "games_finished": stats.games_finished,
+        "errors": stats.errors,
+        "rejected": stats.rejected,
+        "broadcast_latency_ms": {
+            "p50": percentile(stats.latencies, 50) * 1000,
+            "p99": percentile(stats.latencies, 99) * 1000,
+            "max": max(stats.latencies, default=0) * 1000,
+            "samples": len(stats.latencies),
+        },
+        "messages_per_second": stats.delivered / elapsed if elapsed else 0,
+        "event_loop_lag_ms": {
+            "p50": percentile(monitor.samples, 50) * 1000,
+            "p99": percentile(monitor.samples, 99) * 1000,
+            "max": max(monitor.samples, default=0) * 1000,
+            "mean": statistics.fmean(monitor.samples) * 1000 if monitor.samples else 0,
+        },
+        "memory_per_session_bytes": max(0, peak_rss - rss_before) / sessions,
+    }
+
+
+async def serve(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws_max_queue=1024))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+async def main_async(args):
+    # Configure the backend through the environment, which create_app reads
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.stub_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+    os.environ["LLM_STUB_LATENCY"] = str(args.llm_latency)
+    os.environ["GAME_CHAT_SECONDS"] = str(args.chat_seconds)
+    os.environ["GAME_VOTING_SECONDS"] = str(args.voting_seconds)
+    os.environ["CHAT_RATE"] = str(args.chat_rate)
+    os.environ["SESSION_CHAT_RATE"] = str(args.session_chat_rate)
+
+    from main import create_app
+    from tools.llm_stub import app as stub_app
+
+    stub, stub_task = await serve(stub_app, args.stub_port)
+    backend, backend_task = await serve(create_app(), args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    ws_url = f"ws://127.0.0.1:{args.port}"
+
+    results = []
+    try:
+        for sessions in args.sessions:
+            result = await run_level(sessions, base_url, ws_url, args)
+            results.append(result)
+            print(f"{sessions:>6} sessions: p50 {result['broadcast_latency_ms']['p50']:.1f} ms, "
+                  f"p99 {result['broadcast_latency_ms']['p99']:.1f} ms, "
+                  f"{result['messages_per_second']:.0f} msg/s, "
+                  f"loop lag p99 {result['event_loop_lag_ms']['p99']:.1f} ms, "
+                  f"{result['memory_per_session_bytes'] / 1024:.1f} KiB/session, "
+                  f"{result['rejected']} rejected")
+    finally:
+        backend.should_exit = True
+        stub.should_exit = True
+        await asyncio.gather(backend_task, stub_task)
+
+    report = {
+        "config": {
+            "players": args.players,
+            "chat_interval_s": args.chat_interval,
+            "chat_seconds": args.chat_seconds,
+            "voting_seconds": args.voting_seconds,
+            "llm_latency_s": args.llm_latency,
+            "chat_rate": args.chat_rate,
+            "session_chat_rate": args.session_chat_rate,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=lambda v: [int(n) for n in v.split(",")], default=[1, 10, 100],
+                        help="comma-separated session counts to run, e.g. 1,10,100,1000,10000")
+    parser.add_argument("--players", type=int, default=4, help="human players per session")
+    parser.add_argument("--chat-interval", type=float, default=1.0, help="mean seconds between a player's messages")
+    parser.add_argument("--chat-seconds", type=float, default=5.0, help="length of the chat phase")
+    parser.add_argument("--voting-seconds", type=float, default=2.0, help="length of the voting phase")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds the LLM stub takes to answer")
+    parser.add_argument("--chat-rate", type=float, default=0,
+                        help="per-player chat limit in messages per second (0, the default, disables it)")
+    parser.add_argument("--session-chat-rate", type=float, default=0,
+                        help="per-session chat limit in messages per second (0, the default, disables it)")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="max simultaneous connection attempts")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--stub-port", type=int, default=8101)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
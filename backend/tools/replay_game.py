@@ -0,0 +1,44 @@
+"""
+Rebuild a GameSession from its game log.
+
+    python -m tools.replay_game game_logs/session-3.jsonl [--events 40 | --until 1737459812.4]
+    python -m tools.replay_game game_logs/session-3.jsonl --transcript
+
+Prints the session as JSON after the given number of events or as of the
+given timestamp (default: the end of the log). --transcript prints the
+game's chat as "name: text" lines instead, in the form used to build
+fine-tuning data. It includes every message, not just the rolling window.
+"""
+import argparse
+
+from service.game_log import read_events, replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="a session-<id>.jsonl file from GAME_LOG_DIR (or GAME_LOG_DIR/finished)")
+    parser.add_argument("--events", type=int, help="replay only the first N events")
+    parser.add_argument("--until", type=float, help="replay events up to this Unix timestamp")
+    parser.add_argument("--transcript", action="store_true", help="print the chat instead of the session state")
+    args = parser.parse_args()
+
+    events = list(read_events(args.path))
+    if args.transcript:
+        for event in events[:args.events]:
+            if args.until is not None and event["t"] > args.until:
+                break
+            if event["e"] == "create":
+                print(f"--- game {event['s']} ({event['topic']}) ---")
+            elif event["e"] in ("chat", "ai_reply"):
+                print(f"{event['name']}: {event['text']}")
+        return
+
+    session = replay(events, until=args.until, count=args.events)
+    if session is None:
+        print("No game has started at that point in the log.")
+        return
+    print(session.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,62 @@
-import React, { createContext, useContext, useState } from 'react';
+import React, { createContext, useContext, useRef, useState } from 'react';
 
 const WebSocketContext = createContext(null);
 
+// How long to wait before trying to resume a dropped connection
+const RECONNECT_DELAY_MS = 1000;
+
+// Close codes after which there is nothing to resume: a normal close, the server
+// refusing the join (e.g. the room is full) and the game being over
+const FINAL_CLOSE_CODES = [1000, 1008, 4000];
+
 export function WebSocketProvider({ children }) {
     const [ws, setWs] = useState(null);
+    // Resume state for the current session; the pages replace ws.onmessage,
+    // so the connection bookkeeping lives in its own listener
+    const resume = useRef({ sessionId: null, token: null, lastSeq: 0, closing: false });
+
+    const connect = (state, query = '') => {
+        const newWs = new WebSocket(`ws://127.0.0.1:8000/ws/${state.sessionId}${query}`);
+
+        newWs.addEventListener('message', (event) => {
+            let data;
+            try {
+                data = JSON.parse(event.data);
+            } catch (error) {
+                return;
+            }
+            if (data.type === 'ping') {
+                newWs.send(JSON.stringify({ action: 'pong' }));
+            } else if (data.type === 'welcome') {
+                state.token = data.token;
+            }
+            if (data.seq) {
+                state.lastSeq = Math.max(state.lastSeq, data.seq);
+            }
+        });
+
+        newWs.addEventListener('close', (event) => {
+            // Closed by us, rejected by the server or the game is over: don't resume
+            if (state.closing || !state.token || FINAL_CLOSE_CODES.includes(event.code)) {
+                return;
+            }
+            setTimeout(() => {
+                if (!state.closing) {
+                    setWs(connect(state, `?token=${encodeURIComponent(state.token)}&last_seq=${state.lastSeq}`));
+                }
+            }, RECONNECT_DELAY_MS);
+        });
+
+        return newWs;
+    };
 
     const createConnection = (sessionId) => {
         if (ws) {
+            resume.current.closing = true;
             ws.close();
         }
-        const newWs = new WebSocket(`ws://127.0.0.1:8000/ws/${sessionId}`);
+        resume.current = { sessionId, token: null, lastSeq: 0, closing: false };
+        const newWs = connect(resume.current);
         setWs(newWs);
         return newWs;
     };
@@ -21,4 +68,4 @@ export function WebSocketProvider({ children }) {
     );
 }
 
-export const useWebSocket = () => useContext(WebSocketContext);
\ No newline at end of file
+export const useWebSocket = () => useContext(WebSocketContext);
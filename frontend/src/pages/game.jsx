@@ -5,14 +5,18 @@ import { useWebSocket } from '../WebSocketContext';
 export default function Game() {
     const [messages, setMessages] = useState([]);
     const [inputMessage, setInputMessage] = useState('');
-    const [remainingTime, setRemainingTime] = useState(300);
+    const location = useLocation();
+    const { ws } = useWebSocket();
+    const sessionId = location.state?.sessionId;
+    // The server drives the rounds: round_start and voting_start carry how long the phase lasts
+    const [round, setRound] = useState(location.state?.round ?? 1);
+    const [phase, setPhase] = useState('chat'); // 'chat', 'voting', 'results' or 'over'
+    const [remainingTime, setRemainingTime] = useState(Math.round(location.state?.duration ?? 0));
     const [isVoting, setIsVoting] = useState(false); // State for voting popup
+    const [candidates, setCandidates] = useState([]); // Players that can be voted for, as { id, name }
     const [vote, setVote] = useState(null); // State to track the selected vote
     const [votingResult, setVotingResult] = useState(null); // State for voting result message
     const [playerAssignments, setPlayerAssignments] = useState({}); // Mapping of sessionId to pseudonym/color
-    const location = useLocation();
-    const { ws } = useWebSocket();
-    const sessionId = location.state?.sessionId;
     const messageContainerRef = useRef(null);
 
     // Predefined pseudonyms and colors
@@ -38,22 +42,45 @@ export default function Game() {
                     setMessages((prev) => [...prev, data]);
 
                     // Assign pseudonym/color to new users
-                    if (!playerAssignments[data.author]) {
-                        assignPseudonymAndColor(data.author);
-                    }
+                    assignPseudonyms([data.author]);
                 }
 
-                if (data.type === 'voting_result') {
-                    setVotingResult(data.message); // Update voting result
-                    setIsVoting(false); // Ensure voting popup is closed
+                // A new chat round
+                if (data.type === 'round_start') {
+                    setRound(data.round);
+                    setPhase('chat');
+                    setRemainingTime(Math.round(data.duration));
+                    setIsVoting(false);
+                    setVote(null);
+                }
+
+                // Chat time is up: open the ballot
+                if (data.type === 'voting_start') {
+                    setPhase('voting');
+                    setRemainingTime(Math.round(data.duration));
+                    // Players who never chatted get a pseudonym too, so no real name shows on the ballot
+                    setCandidates(data.candidates || []);
+                    assignPseudonyms((data.candidates || []).map((candidate) => candidate.name));
+                    setVote(null);
+                    setIsVoting(true);
                 }
-                
 
-                // Handle voting result
+                // Handle voting result, then the round's outcome
                 if (data.type === 'voting_result') {
+                    setPhase('results');
+                    setRemainingTime(0);
                     setVotingResult(data.message); // Update voting result
                     setIsVoting(false); // Ensure voting popup is closed
                 }
+                if (data.type === 'elimination' || data.type === 'game_over') {
+                    setVotingResult((prev) => (prev ? `${prev} ${data.message}` : data.message));
+                }
+
+                if (data.type === 'game_over' || data.type === 'session_closed') {
+                    setPhase('over');
+                    setRemainingTime(0);
+                    setIsVoting(false);
+                }
             } catch (e) {
                 console.log('Received plain text:', event.data);
             }
@@ -62,7 +89,7 @@ export default function Game() {
         return () => {
             ws.onmessage = null;
         };
-    }, [ws, playerAssignments]);
+    }, [ws]);
 
     useEffect(() => {
         if (messageContainerRef.current) {
@@ -70,30 +97,26 @@ export default function Game() {
         }
     }, [messages]);
 
+    // Count down the current phase; the server announces when the next one starts
     useEffect(() => {
         const timer = setInterval(() => {
-            setRemainingTime((prev) => {
-                if (prev <= 0) {
-                    clearInterval(timer);
-                    setIsVoting(true); // Trigger the voting popup when time is up
-                    return 0;
-                }
-                return prev - 1;
-            });
+            setRemainingTime((prev) => Math.max(prev - 1, 0));
         }, 1000);
 
         return () => clearInterval(timer);
     }, []);
 
-    const assignPseudonymAndColor = (sessionId) => {
-        const keys = Object.keys(playerAssignments);
-        const index = keys.length % nameColorPairs.length; // Assign based on current player count
-        const assignment = nameColorPairs[index];
-
-        setPlayerAssignments((prev) => ({
-            ...prev,
-            [sessionId]: assignment,
-        }));
+    const assignPseudonyms = (authors) => {
+        setPlayerAssignments((prev) => {
+            const next = { ...prev };
+            authors.forEach((author) => {
+                if (!next[author]) {
+                    // Assign based on how many players have one so far
+                    next[author] = nameColorPairs[Object.keys(next).length % nameColorPairs.length];
+                }
+            });
+            return next;
+        });
     };
 
     const handleSubmit = (e) => {
@@ -110,7 +133,7 @@ export default function Game() {
     };
 
     const handleVoteSubmit = () => {
-        if (!vote) return;
+        if (vote === null) return;
 
         // Send the vote to the backend
         ws.send(
@@ -132,10 +155,13 @@ export default function Game() {
     return (
         <div className="h-screen flex flex-col items-center font-sans">
             <p className="text-4xl mt-10">Room {sessionId}</p>
-            <p className="text-xl">Time Remaining: {formatTime(remainingTime)}</p>
-            {remainingTime === 0 && (
+            <p className="text-xl">Round {round} - Time Remaining: {formatTime(remainingTime)}</p>
+            {phase === 'voting' && (
                 <p className="text-lg text-red-500">Time's up! Cast your vote!</p>
             )}
+            {phase === 'over' && (
+                <p className="text-lg text-red-500">The game is over.</p>
+            )}
 
             {/* Message Display Area */}
             <div
@@ -184,13 +210,14 @@ export default function Game() {
                         value={inputMessage}
                         onChange={(e) => setInputMessage(e.target.value)}
                         placeholder="Type your message..."
+                        maxLength={500}
                         className="flex-1 p-2 rounded-lg border"
-                        disabled={remainingTime <= 0 || isVoting}
+                        disabled={phase !== 'chat' || isVoting}
                     />
                     <button
                         type="submit"
                         className="bg-blue-500 text-white px-4 py-2 rounded-lg hover:bg-blue-600"
-                        disabled={remainingTime <= 0 || isVoting}
+                        disabled={phase !== 'chat' || isVoting}
                     >
                         Send
                     </button>
@@ -218,15 +245,15 @@ export default function Game() {
                 <div className="absolute top-0 left-0 w-full h-full flex items-center justify-center bg-black bg-opacity-50">
                     <div className="bg-white p-6 rounded-lg shadow-lg">
                         <h2 className="text-xl font-bold mb-4">Cast Your Vote</h2>
-                        {Object.entries(playerAssignments).map(([playerId, player], index) => (
+                        {candidates.map((candidate) => (
                             <button
-                                key={index}
+                                key={candidate.id}
                                 className={`block w-full p-2 mb-2 rounded-lg border ${
-                                    vote === playerId ? 'bg-blue-500 text-white' : 'bg-gray-100'
+                                    vote === candidate.id ? 'bg-blue-500 text-white' : 'bg-gray-100'
                                 }`}
-                                onClick={() => setVote(playerId)}
+                                onClick={() => setVote(candidate.id)}
                             >
-                                {player.name}
+                                {(playerAssignments[candidate.name] || { name: 'Unknown' }).name}
                             </button>
                         ))}
                         <button
@@ -6,6 +6,7 @@ import { useWebSocket } from '../WebSocketContext';
 export default function Lobby() {
     const [users, setUsers] = useState([]);
     const [activePlayerCount, setActivePlayerCount] = useState(0);
+    const [maxPlayers, setMaxPlayers] = useState(0);
     const [notification, setNotification] = useState('');
     const location = useLocation();
     const { ws } = useWebSocket();
@@ -20,19 +21,14 @@ export default function Lobby() {
                 const response = await fetch(`http://127.0.0.1:8000/get_players/${sessionId}`);
                 const data = await response.json();
                 setActivePlayerCount(data.player_count);
+                setMaxPlayers(data.max_players);
             } catch (error) {
                 console.error('Error fetching active players:', error);
             }
         };
 
-        // Initial fetch
+        // Initial fetch; later changes arrive as lobby_update messages
         fetchActivePlayers();
-
-        // Set up interval
-        const interval = setInterval(fetchActivePlayers, 5000);
-
-        // Cleanup
-        return () => clearInterval(interval);
     }, [sessionId]);
 
     useEffect(() => {
@@ -51,9 +47,14 @@ export default function Lobby() {
                 console.log('Parsed JSON:', data);
     
                 // Check the message type
-                if (data.type === 'start_game') {
+                if (data.type === 'lobby_update') {
+                    setActivePlayerCount(data.player_count);
+                    setMaxPlayers(data.max_players);
+                } else if (data.type === 'start_game') {
                     console.log('Received start_game message:', data.message);
-                    navigate("/game", { state: { sessionId } });
+                } else if (data.type === 'round_start') {
+                    // The first round's countdown starts now; the game page takes it from here
+                    navigate("/game", { state: { sessionId, round: data.round, duration: data.duration } });
                 } else if (data.type === 'chat') {
                     console.log(`Chat from ${data.author}: ${data.message}`);
                     const message = JSON.parse(data.message)
@@ -111,7 +112,7 @@ export default function Lobby() {
             <p className="text-4xl">Lobby</p>
             <div className='text-lg my-4'>
                 <p>Currently hosted on  <b> Port {sessionId}</b> </p>
-                <p>Active Players: <b>{activePlayerCount}</b></p>
+                <p>Active Players: <b>{activePlayerCount}{maxPlayers ? ` / ${maxPlayers}` : ''}</b></p>
             </div>
             
 
@@ -34,6 +34,33 @@ export default function MainPage() {
         }
     };
 
+    const handleQuickMatch = async () => {
+        try {
+            const response = await fetch('http://127.0.0.1:8000/matchmaking/join', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+            });
+
+            if (response.ok) {
+                const data = await response.json();
+                const ws = createConnection(data.session_id);
+
+                ws.onopen = () => {
+                    navigate("/lobby", {
+                        state: {
+                            isCreator: false,
+                            sessionId: data.session_id
+                        }
+                    });
+                };
+            }
+        } catch (error) {
+            console.error('Error finding a match:', error);
+        }
+    };
+
     const handleJoinLobby = () => {
         if (!portNumber) {
             alert("Please enter a port number");
@@ -85,6 +112,10 @@ export default function MainPage() {
                         Create Lobby
                     </button>
 
+                    <button onClick={handleQuickMatch} className="p-4 rounded-xl bg-blue-500 w-48 text-white mt-4 hover:bg-blue-700">
+                        Quick Match
+                    </button>
+
                 </div>
 
                 